@@ -1,110 +1,123 @@
 import cv2
-import numpy as np
-import mediapipe as mp
+import sys
 import time
+from rep_engine import RepEngine
+from exercises import BICEPS_CURL
+from rep_telemetry import RepTelemetry, stream_name
+from database import get_rep_log
+from landmark_recording import LandmarkRecorder
+from frame_skip import AdaptiveFrameSkipper
+from pose_pipeline import PosePipeline
+from pose_renderer import PoseRenderer
+from pose_engine import get_engine
+from stage_timing import stage_timer
+from media_clock import MediaClock, capture_seconds
 
 class BicepsCurlTracker:
-    def __init__(self):
-        self.mp_pose = mp.solutions.pose
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.pose = self.mp_pose.Pose(
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
-
-        self.count = 0
-        self.state = "down"
-        self.feedback = ""
+    def __init__(self, engine=None, sink=None):
+        self.renderer = PoseRenderer()
+        # Pose graph lấy từ engine dùng chung, không bỏ frame
+        self.pipeline = PosePipeline(engine or get_engine(),
+                                     skipper=AdaptiveFrameSkipper(max_skip=0))
+        self.landmarks = self.pipeline.landmarks
+
+        # Máy trạng thái đếm rep (ngưỡng góc, thời gian giữ trong exercises.py)
+        self.reps = RepEngine(BICEPS_CURL)
+        # Timestamp của frame -> thời gian đơn điệu cho máy trạng thái
+        self.clock = MediaClock()
+        self.recorder = None
+        # Chi tiết từng rep (thời gian, biên độ góc, giữ, lỗi) -> sink, mặc định bảng reps
+        # (ghi ở thread nền; database chỉ được mở khi không truyền sink)
+        self.telemetry = RepTelemetry(self.reps, sink or get_rep_log().put, stream_name("biceps_curl"))
         self.last_feedback = ""
-        self.up_time = None
-        self.min_rep_time = 0.4
-
-        # Ngưỡng góc (Giống Bicep Curl của bạn)
-        self.FULL_DOWN = 80    
-        self.MID_POINT = 120   
-        self.FULL_UP = 160     
-        self.WRIST_DRIFT = 0.15 
-
-    def calculate_angle(self, a, b, c):
-        a, b, c = np.array(a), np.array(b), np.array(c)
-        radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-        angle = np.abs(radians * 180.0 / np.pi)
-        if angle > 180: angle = 360 - angle
-        return angle
-
-    def process_frame(self, frame):
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image.flags.writeable = False
-        results = self.pose.process(image)
-        image.flags.writeable = True
-        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+
+        # Histogram độ trễ từng công đoạn (None khi POSE_TIMING=0)
+        self.timing = stage_timer("biceps_curl")
+        self.pipeline.timing = self.timing
+
+    @property
+    def count(self):
+        return int(self.reps.count[0])
+
+    @property
+    def state(self):
+        return self.reps.state_name()
+
+    def process_frame(self, frame, timestamp=None):
+        timing = self.timing
+        # Mọi mốc thời gian (giữ, thời lượng rep) theo timestamp của frame (giây);
+        # frame không có timestamp thì theo đồng hồ máy
+        now = self.clock(timestamp)
+        lm = self.pipeline.detect(frame, now)
+        if timing:
+            t = time.perf_counter()
+        # Vẽ thẳng lên frame BGR gốc, không tạo bản sao
+        image = frame
+        reps = self.reps
 
         form_warning = ""
         angle = 0
 
-        if results.pose_landmarks:
-            landmarks = results.pose_landmarks.landmark
-            l_s = [landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER].x, landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER].y]
-            l_e = [landmarks[self.mp_pose.PoseLandmark.LEFT_ELBOW].x, landmarks[self.mp_pose.PoseLandmark.LEFT_ELBOW].y]
-            l_w = [landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST].x, landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST].y]
-            r_s = [landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER].x, landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER].y]
-            r_e = [landmarks[self.mp_pose.PoseLandmark.RIGHT_ELBOW].x, landmarks[self.mp_pose.PoseLandmark.RIGHT_ELBOW].y]
-            r_w = [landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST].x, landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST].y]
-
-            angle = (self.calculate_angle(l_s, l_e, l_w) + self.calculate_angle(r_s, r_e, r_w)) / 2
-            current_time = time.time()
-
-            # Kiểm tra form cơ bản
-            if abs(l_w[0] - l_e[0]) > self.WRIST_DRIFT or abs(r_w[0] - r_e[0]) > self.WRIST_DRIFT:
-                form_warning = "Keep wrists over elbows!"
-            else:
-                if self.state == "down" and angle > self.MID_POINT:
-                    self.state = "pressing"
-                    self.feedback = "Pushing..."
-                elif self.state == "pressing":
-                    if angle >= self.FULL_UP:
-                        self.state = "up"
-                        self.up_time = current_time
-                    elif angle < self.FULL_DOWN: self.state = "down"
-                elif self.state == "up" and (current_time - self.up_time) >= self.min_rep_time:
-                    if angle < self.MID_POINT: self.state = "lowering"
-                elif self.state == "lowering" and angle <= self.FULL_DOWN:
-                    self.count += 1
-                    self.state = "down"
-                    self.feedback = f"Rep {self.count}! Good job!"
-
-            self.mp_drawing.draw_landmarks(image, results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
+        if lm is not None:
+            # Kiểm tra form + đếm rep theo bảng chuyển trạng thái BICEPS_CURL
+            reps.step(lm.data[None], lm.angles[None], now, rates=lm.angle_rates[None])
+            self.telemetry.observe(now)
+            angle = reps.metric[0]
+            form_warning = reps.warning()
+        feedback = reps.feedback()
+        if self.recorder:
+            self.recorder.write_reps(now, lm.data if lm is not None else None, reps)
+        if timing:
+            t = timing.lap("reps", t)
 
         # Cập nhật last_feedback
-        if self.feedback:
-            self.last_feedback = self.feedback
+        if feedback:
+            self.last_feedback = feedback
         elif form_warning:
             self.last_feedback = form_warning
         else:
             self.last_feedback = "Ready"
 
         # GIAO DIỆN (Y hệt ảnh mẫu bạn gửi)
-        cv2.putText(image, f'Angle: {int(angle)}', (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 3)
-        cv2.putText(image, f'Count: {self.count}', (10, 85), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 100, 0), 2)
-        cv2.putText(image, f'State: {self.state}', (10, 125), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 140, 0), 2)
+        if lm is not None:
+            self.renderer.draw_pose(image, lm.data)
+        self.renderer.text(image, f'Angle: {int(angle)}', (10, 40), 1.2, (0, 0, 0), 3)
+        self.renderer.text(image, f'Count: {self.count}', (10, 85), 1, (0, 100, 0), 2)
+        self.renderer.text(image, f'State: {self.state}', (10, 125), 0.8, (255, 140, 0), 2)
         if form_warning:
-            cv2.putText(image, form_warning, (10, 175), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-        if self.feedback:
-            cv2.putText(image, self.feedback, (10, 215), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            self.renderer.text(image, form_warning, (10, 175), 0.8, (0, 0, 255), 2)
+        if feedback:
+            self.renderer.text(image, feedback, (10, 215), 0.7, (0, 255, 0), 2)
+        if timing:
+            timing.lap("draw", t)
 
-        return image, self.count, self.last_feedback
+        return image, self.count, self.last_feedback, self.state
     
+    def start_recording(self, path):
+        """Ghi landmarks, góc, state và count của từng frame vào file path"""
+        self.stop_recording()
+        self.recorder = LandmarkRecorder.for_reps(path, self.reps)
+
+    def stop_recording(self):
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
     def reset(self):
         """Reset counter và state"""
-        self.count = 0
-        self.state = "down"
-        self.feedback = ""
+        self.reps.reset()
+        self.telemetry.reset()
         self.last_feedback = "Reset"
-        self.up_time = None
 
+    def cleanup(self):
+        """Trả pose graph về engine dùng chung"""
+        self.pipeline.close()
+        self.stop_recording()
+
+# Chạy riêng: python BicepCurl.py [video] (mặc định webcam)
 if __name__ == "__main__":
     tracker = BicepsCurlTracker()
-    cap = cv2.VideoCapture(0)
+    cap = cv2.VideoCapture(sys.argv[1] if len(sys.argv) > 1 else 0)
     window_name = "Overhead Press Tracker"
     
     # Khởi tạo cửa sổ trước khi vào vòng lặp
@@ -115,7 +128,7 @@ if __name__ == "__main__":
         if not ret: break
         
         frame = cv2.flip(frame, 1)
-        output, _, _ = tracker.process_frame(frame)
+        output, _, _, _ = tracker.process_frame(frame, capture_seconds(cap))
         
         # Kiểm tra xem cửa sổ có còn tồn tại không trước khi hiển thị
         if cv2.getWindowProperty(window_name, cv2.WND_PROP_VISIBLE) < 1:
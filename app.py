@@ -1,102 +1,279 @@
 import streamlit as st
-import cv2
-import mediapipe as mp
-import numpy as np
-from streamlit_webrtc import webrtc_streamer, WebRtcMode
-
-# Khởi tạo Mediapipe bên ngoài class để tránh lỗi module
-mp_drawing = mp.solutions.drawing_utils
-mp_pose = mp.solutions.pose
+import time
+from datetime import datetime
+from exercise_registry import APP_EXERCISES, app_spec
 
 class ExerciseTracker:
-    def __init__(self):
-        self.pose = mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
+    def __init__(self, engine=None, sink=None):
+        # Pose graph dùng chung cho mọi session (pool giới hạn trong PoseEngine),
+        # không bỏ frame
+        engine = engine or get_engine(
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
-        self.count = 0
-        self.stage = None
-
-    def calculate_angle(self, a, b, c):
-        a, b, c = np.array(a), np.array(b), np.array(c)
-        radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-        angle = np.abs(radians*180.0/np.pi)
-        return 360-angle if angle > 180.0 else angle
-
-    def process(self, image, ex_type):
-        image = cv2.flip(image, 1)
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(image_rgb)
-        
-        if results.pose_landmarks:
-            landmarks = results.pose_landmarks.landmark
-            
-            # Tọa độ các khớp cơ bản
-            shoulder = [landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].x,
-                        landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y]
-            elbow = [landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].x,
-                     landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].y]
-            wrist = [landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].x,
-                     landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].y]
-            hip = [landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].x,
-                   landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].y]
-
-            angle = 0
-            # --- LOGIC TỪNG BÀI TẬP ---
-            if ex_type == "Bicep Curl":
-                angle = self.calculate_angle(shoulder, elbow, wrist)
-                if angle > 160: self.stage = "xuong"
-                if angle < 30 and self.stage == 'xuong':
-                    self.stage, self.count = "len", self.count + 1
-
-            elif ex_type == "Overhead Press":
-                angle = self.calculate_angle(shoulder, elbow, wrist)
-                if angle < 60: self.stage = "xuong"
-                if angle > 160 and self.stage == 'xuong':
-                    self.stage, self.count = "len", self.count + 1
-
-            elif ex_type == "Lateral Raise":
-                # Góc giữa khuỷu tay - vai - hông
-                angle = self.calculate_angle(elbow, shoulder, hip)
-                if angle < 30: self.stage = "xuong"
-                if angle > 80 and self.stage == 'xuong':
-                    self.stage, self.count = "len", self.count + 1
-
-            # Vẽ skeleton và thông tin
-            mp_drawing.draw_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
-            cv2.rectangle(image, (0,0), (250, 80), (245, 117, 16), -1)
-            cv2.putText(image, f'REP: {self.count}', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            cv2.putText(image, f'STATE: {self.stage}', (10, 65), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            
+        self.pipeline = PosePipeline(engine, skipper=AdaptiveFrameSkipper(max_skip=0))
+        self.landmarks = self.pipeline.landmarks
+        self.renderer = PoseRenderer()
+        # Buffer RGB dùng lại qua các frame (cv2 dst=)
+        self.buffers = self.pipeline.buffers
+        # Mỗi bài tập là một bảng chuyển trạng thái (exercises.py), chạy chung một evaluator;
+        # RepEngine + telemetry của một bài chỉ được tạo khi bài đó được tập lần đầu
+        self.reps = {}
+        # Chi tiết từng rep -> sink, mặc định bảng reps (hàng đợi ghi nền, không chặn thread video)
+        self.telemetry = {}
+        self.sink = sink
+        self.stream = stream_name("app")
+        # Thời gian theo timestamp của frame WebRTC (pts), không theo lúc xử lý
+        self.clock = MediaClock()
+        self.recorder = None
+        # Histogram độ trễ từng công đoạn; None = tắt (mỗi hook chỉ còn một phép if)
+        self.timing = None
+        self.set_timing(TIMING_ENABLED)
+
+    def set_timing(self, enabled):
+        if enabled and self.timing is None:
+            self.timing = stage_timer("app")
+        elif not enabled:
+            self.timing = None
+        self.pipeline.timing = self.timing
+
+    def exercise(self, ex_type):
+        """RepEngine của bài ex_type (tạo ở lần dùng đầu tiên)"""
+        reps = self.reps.get(ex_type)
+        if reps is None:
+            reps = self.reps[ex_type] = RepEngine(app_spec(ex_type))
+            self.telemetry[ex_type] = RepTelemetry(reps, self.sink or get_rep_log().put, self.stream)
+        return reps
+
+    def reset(self):
+        for reps in self.reps.values():
+            reps.reset()
+        for telemetry in self.telemetry.values():
+            telemetry.reset()
+
+    def start_recording(self, path, ex_type):
+        """Ghi landmarks, góc, state và count từng frame (bài ex_type) vào file path"""
+        self.stop_recording()
+        self.recorder = LandmarkRecorder.for_reps(path, self.exercise(ex_type))
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder:
+            recorder.close()
+
+    def analyze(self, image_rgb, ex_type, now=None):
+        """Inference + đếm rep tại thời điểm now của frame. Trả về overlay (landmarks, count, stage) để vẽ"""
+        timing = self.timing
+        if now is None:
+            now = self.clock()
+        lm = self.pipeline.detect(image_rgb, now, bgr=False)
+        if timing:
+            t = time.perf_counter()
+        reps = self.exercise(ex_type)
+        if lm is not None:
+            # Toàn bộ góc khớp đã được tính sẵn trong buffer
+            reps.step(lm.data[None], lm.angles[None], now, rates=lm.angle_rates[None])
+            self.telemetry[ex_type].observe(now)
+        recorder = self.recorder
+        if recorder:
+            recorder.write_reps(now, lm.data if lm is not None else None, reps)
+        if timing:
+            timing.lap("reps", t)
+
+        # Bản sao landmarks: overlay có thể được vẽ ở thread khác (async)
+        return (lm.data.copy() if lm is not None else None), int(reps.count[0]), reps.state_name()
+
+    def draw(self, image, overlay):
+        landmarks, count, stage = overlay
+        if landmarks is None:
+            return image
+        # Vẽ skeleton và thông tin (banner tĩnh và text được cache trong renderer)
+        self.renderer.draw_pose(image, landmarks, (224, 224, 224), (0, 0, 255))
+        self.renderer.panel(image, ((0, 0), (250, 80)), (245, 117, 16))
+        self.renderer.text(image, f'REP: {count}', (10, 30), 1, (255, 255, 255), 2)
+        self.renderer.text(image, f'STATE: {stage}', (10, 65), 1, (255, 255, 255), 2)
         return image
 
+    def process(self, image, ex_type, now=None):
+        # Lật tại chỗ và vẽ thẳng lên frame BGR gốc; RGB vào buffer có sẵn
+        timing = self.timing
+        if timing:
+            t = time.perf_counter()
+        self.buffers.flip(image)
+        if timing:
+            t = timing.lap("flip", t)
+        image_rgb = self.buffers.to_rgb(image)
+        if timing:
+            timing.lap("convert", t)
+        overlay = self.analyze(image_rgb, ex_type, now)
+        if timing:
+            t = time.perf_counter()
+        self.draw(image, overlay)
+        if timing:
+            timing.lap("draw", t)
+        return image
+
+    def submit_buffer(self, image):
+        """Bản RGB của frame trong buffer lấy từ pool, để gửi sang worker async"""
+        rgb = self.buffers.acquire("async_rgb", image.shape)
+        return self.buffers.to_rgb(image, dst=rgb)
+
+    def recycle_buffer(self, image_rgb, *args):
+        self.buffers.release("async_rgb", image_rgb)
+
+@st.cache_resource
+def load_engine(backend):
+    """Pose engine dùng chung cho cả server (giữ qua mọi lần rerun và mọi session)"""
+    if backend == "Worker processes":
+        from process_engine import get_process_engine
+        return get_process_engine(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    return get_engine(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+@st.cache_resource
+def warm_engine(backend):
+    """Import mediapipe, load model và chạy inference đầu tiên ở thread nền (một lần cho cả server)"""
+    return warm_in_background(load_engine(backend))
+
 # --- GIAO DIỆN STREAMLIT ---
 st.set_page_config(page_title="AI Fitness Pro", layout="wide")
 st.title("🏋️‍♂️ AI Universal Fitness Tracker")
 
-choice = st.sidebar.selectbox("Chọn bài tập:", ["Bicep Curl", "Overhead Press", "Lateral Raise"])
+choice = st.sidebar.selectbox("Chọn bài tập:", APP_EXERCISES)
 st.sidebar.info(f"Đang tập: {choice}")
 
-if 'tracker' not in st.session_state:
-    st.session_state.tracker = ExerciseTracker()
+# Inference trong process này (thread) hoặc ở các worker process (shared memory)
+backend = st.sidebar.radio("Inference backend", ["Threads", "Worker processes"], horizontal=True)
+
+# Pipeline (numpy, cv2) chỉ cần từ lúc tạo tracker: import sau khi sidebar đã hiện
+from rep_engine import RepEngine
+from rep_telemetry import RepTelemetry, stream_name
+from database import get_rep_log
+from landmark_recording import LandmarkRecorder
+from frame_skip import AdaptiveFrameSkipper
+from pose_pipeline import PosePipeline
+from pose_renderer import PoseRenderer
+from pose_engine import get_engine, warm_in_background
+from stage_timing import ENABLED as TIMING_ENABLED, stage_timer, start_snapshots
+from media_clock import MediaClock, frame_seconds
+
+if st.session_state.get('backend') != backend:
+    # Dừng worker trước (đợi frame đang inference xong) rồi mới đóng pipeline của tracker cũ
+    if 'worker' in st.session_state:
+        st.session_state.pop('worker').stop()
+    if 'tracker' in st.session_state:
+        st.session_state.tracker.pipeline.close()
+        st.session_state.tracker.stop_recording()
+    st.session_state.tracker = ExerciseTracker(load_engine(backend))
+    st.session_state.backend = backend
+
+# Async: callback trả frame ngay, inference chạy trên pool thread dùng chung cho mọi
+# session (round-robin, frame mới nhất thắng)
+async_mode = st.sidebar.checkbox("Async inference (latest frame wins)")
+if async_mode and 'worker' not in st.session_state:
+    from async_pipeline import get_scheduler
+    scheduler = get_scheduler(st.session_state.tracker.pipeline.engine.max_graphs)
+    st.session_state.worker = scheduler.open_session(st.session_state.tracker.analyze,
+                                                     recycle=st.session_state.tracker.recycle_buffer)
+elif not async_mode and 'worker' in st.session_state:
+    # Tắt async: rời scheduler dùng chung, không để session treo lại trong stats
+    st.session_state.pop('worker').stop()
+
+with st.sidebar.expander("Pose engine"):
+    pipeline = st.session_state.tracker.pipeline
+    st.json(pipeline.engine.metrics())
+    st.json(pipeline.buffers.stats())
+    if pipeline.gate:
+        # Frame tĩnh (không ai cử động / frame lặp) bỏ qua inference, dùng lại landmarks cũ
+        st.json(pipeline.gate.stats())
+    if pipeline.tuner:
+        st.caption(f"Model complexity: {pipeline.tuner.tier}")
+        for _, old, new, reason in pipeline.tuner.history[-5:]:
+            st.text(f"{old} -> {new}: {reason}")
+    if 'worker' in st.session_state:
+        st.json(st.session_state.worker.stats())
+        scheduler_stats = st.session_state.worker.scheduler.stats()
+        scheduler_stats.pop("per_session")
+        st.json(scheduler_stats)
+
+# Độ trễ từng công đoạn (p50 / p95 / p99), snapshot Prometheus ghi định kỳ ra file
+timing_on = st.sidebar.checkbox("Stage timing", value=TIMING_ENABLED, disabled=not TIMING_ENABLED)
+st.session_state.tracker.set_timing(timing_on)
+if st.session_state.tracker.timing:
+    snapshot_path = start_snapshots()
+    with st.sidebar.expander("Stage latency (ms)"):
+        summary = st.session_state.tracker.timing.summary()
+        st.table([{"stage": stage, "p50": round(row["p50_ms"], 3), "p95": round(row["p95_ms"], 3),
+                   "p99": round(row["p99_ms"], 3), "frames": row["count"]}
+                  for stage, row in summary.items()])
+        st.caption(f"Prometheus snapshot: {snapshot_path}")
 
 # Nút reset số lần tập
 if st.sidebar.button("Reset Counter"):
-    st.session_state.tracker.count = 0
-    st.session_state.tracker.stage = None
+    st.session_state.tracker.reset()
+
+tracker = st.session_state.tracker
+worker = st.session_state.get('worker')
+
+# Ghi landmarks của buổi tập (file nhị phân, đọc lại bằng LandmarkRecording)
+recording = st.sidebar.checkbox("Record landmarks")
+if recording and tracker.recorder is None:
+    name = f"{datetime.now():%Y%m%d_%H%M%S}_{choice.replace(' ', '_')}"
+    tracker.start_recording(f"recordings/{name}.lmr", choice)
+elif not recording and tracker.recorder is not None:
+    tracker.stop_recording()
+if tracker.recorder is not None:
+    st.sidebar.caption(f"{tracker.recorder.path}: {tracker.recorder.frames} frames")
 
 def video_frame_callback(frame):
+    # Lấy thời điểm theo pts của frame ngay trên thread callback (đúng thứ tự frame),
+    # kể cả khi frame bị bỏ hoặc xử lý muộn ở worker async
+    now = tracker.clock(frame_seconds(frame))
+    timing = tracker.timing
+    if timing:
+        t = time.perf_counter()
     img = frame.to_ndarray(format="bgr24")
-    processed_img = st.session_state.tracker.process(img, choice)
-    return av.VideoFrame.from_ndarray(processed_img, format="bgr24")
+    if timing:
+        t = timing.lap("to_ndarray", t)
+    if worker is None:
+        processed_img = tracker.process(img, choice, now)
+        if timing:
+            t = time.perf_counter()
+        out = av.VideoFrame.from_ndarray(processed_img, format="bgr24")
+        if timing:
+            timing.lap("from_ndarray", t)
+        return out
 
+    tracker.buffers.flip(img)
+    if timing:
+        t = timing.lap("flip", t)
+    image_rgb = tracker.submit_buffer(img)
+    if timing:
+        t = timing.lap("convert", t)
+    worker.submit(image_rgb, choice, now)
+    overlay, age = worker.latest()
+    if timing:
+        t = time.perf_counter()
+    if overlay is not None:
+        tracker.draw(img, overlay)
+        tracker.renderer.text(img, f'AGE: {age * 1000:.0f}ms  DROP: {worker.dropped}', (10, 105),
+                              0.6, (245, 117, 16), 2)
+    if timing:
+        t = timing.lap("draw", t)
+    out = av.VideoFrame.from_ndarray(img, format="bgr24")
+    if timing:
+        timing.lap("from_ndarray", t)
+    return out
+
+# Import ở cuối: sidebar đã hiện trước khi tải WebRTC (aiortc, av)
 import av
+from streamlit_webrtc import webrtc_streamer, WebRtcMode
 webrtc_streamer(
     key="fitness-pro",
     mode=WebRtcMode.SENDRECV,
     video_frame_callback=video_frame_callback,
     rtc_configuration={"iceServers": [{"urls": ["stun:stun.l.google.com:19302"]}]},
     media_stream_constraints={"video": True, "audio": False},
-)
\ No newline at end of file
+)
+
+# Trang đã hiển thị xong: warm-up chạy trong lúc WebRTC bắt tay, không tranh GIL với lần render đầu
+warm_engine(backend)
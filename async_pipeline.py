@@ -0,0 +1,328 @@
+import collections
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Inference threads of the shared scheduler (one per pose graph in the pool)
+DEFAULT_WORKERS = 4
+
+
+class ScheduledSession:
+    """One stream's mailbox on an InferenceScheduler.
+
+    submit() never blocks: a frame that is still waiting when a newer one
+    arrives is overwritten and counted as dropped, so the queue can never grow
+    and latency stays bounded by one inference. latest() returns the newest
+    finished result together with its end-to-end age (time since the source
+    frame was submitted). recycle(*args) is called once a submitted frame is
+    no longer needed (dropped or analyzed), e.g. to return its buffer to a
+    pool.
+    """
+
+    def __init__(self, scheduler, analyze, recycle=None):
+        self.scheduler = scheduler
+        self.analyze = analyze
+        self.recycle = recycle
+
+        # Guarded by scheduler._cond
+        self._slot = None
+        self._latest = None
+        self._queued = False
+        self._busy = False
+        self._closed = False
+
+        # Stats
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.last_age = 0.0
+        self.max_age = 0.0
+        self._age_total = 0.0
+        self._age_count = 0
+        self.latencies = collections.deque(maxlen=300)
+
+    def submit(self, *args):
+        """Hand a frame (and analyze() args) to the scheduler, replacing any stale one"""
+        stale = self.scheduler._submit(self, args)
+        if stale is not None and self.recycle:
+            self.recycle(*stale[0])
+
+    def latest(self):
+        """(result, age_seconds) of the newest finished frame, (None, None) before the first"""
+        with self.scheduler._cond:
+            if self._latest is None:
+                return None, None
+            result, submitted_at = self._latest
+            age = time.monotonic() - submitted_at
+            self.last_age = age
+            self.max_age = max(self.max_age, age)
+            self._age_total += age
+            self._age_count += 1
+            return result, age
+
+    def stats(self):
+        with self.scheduler._cond:
+            latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+            return {
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "drop_rate": self.dropped / self.submitted if self.submitted else 0.0,
+                "frame_age_ms": 1000 * self.last_age,
+                "frame_age_avg_ms": 1000 * self._age_total / self._age_count if self._age_count else 0.0,
+                "frame_age_max_ms": 1000 * self.max_age,
+                "latency_p50_ms": 1000 * float(np.percentile(latencies, 50)),
+                "latency_p95_ms": 1000 * float(np.percentile(latencies, 95)),
+            }
+
+    def stop(self, timeout=1.0):
+        """Leave the scheduler; a frame still waiting is recycled, not analyzed.
+
+        Waits up to timeout seconds for a frame already in analyze() to
+        finish, so the caller can release what analyze() uses; False if it
+        is still running.
+        """
+        stale = self.scheduler._close(self)
+        if stale is not None and self.recycle:
+            self.recycle(*stale[0])
+        with self.scheduler._cond:
+            return self.scheduler._cond.wait_for(lambda: not self._busy, timeout)
+
+
+class InferenceScheduler:
+    """Fixed pool of inference threads shared by every active session.
+
+    Each session has a single-slot mailbox (latest frame wins) and at most
+    one frame in flight, so a tracker is never run from two threads at once.
+    Sessions with a waiting frame are served round-robin: a session goes to
+    the back of the ready queue after each inference, so one busy stream
+    can't starve the others however fast it submits. Results go back to the
+    session that submitted the frame.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, name="pose-scheduler"):
+        self.workers = workers
+        self._cond = threading.Condition()
+        self._ready = collections.deque()
+        self._sessions = []
+        self._running = True
+        self._busy = 0
+
+        # Stats
+        self.processed = 0
+        self._completions = collections.deque(maxlen=300)
+        self._busy_time = 0.0
+        self._started = time.monotonic()
+
+        self._threads = [threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def open_session(self, analyze, recycle=None):
+        session = ScheduledSession(self, analyze, recycle)
+        with self._cond:
+            self._sessions.append(session)
+        return session
+
+    def _submit(self, session, args):
+        with self._cond:
+            stale = session._slot
+            if stale is not None:
+                session.dropped += 1
+            session._slot = (args, time.monotonic())
+            session.submitted += 1
+            if not (session._queued or session._busy or session._closed):
+                session._queued = True
+                self._ready.append(session)
+                self._cond.notify()
+        return stale
+
+    def _close(self, session):
+        with self._cond:
+            session._closed = True
+            if session._queued:
+                self._ready.remove(session)
+                session._queued = False
+            if session in self._sessions:
+                self._sessions.remove(session)
+            stale, session._slot = session._slot, None
+        return stale
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._ready and self._running:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                session = self._ready.popleft()
+                session._queued = False
+                session._busy = True
+                args, submitted_at = session._slot
+                session._slot = None
+                self._busy += 1
+
+            start = time.monotonic()
+            ok = False
+            try:
+                result = session.analyze(*args)
+                ok = True
+            except Exception as e:
+                print(f"Inference worker error: {e}")
+            finally:
+                if session.recycle:
+                    session.recycle(*args)
+
+            with self._cond:
+                now = time.monotonic()
+                self._busy -= 1
+                self._busy_time += now - start
+                session._busy = False
+                if ok:
+                    session._latest = (result, submitted_at)
+                    session.processed += 1
+                    session.latencies.append(now - submitted_at)
+                    self.processed += 1
+                    self._completions.append(now)
+                if session._closed:
+                    # Wake stop() waiting for this frame
+                    self._cond.notify_all()
+                # Newer frame arrived meanwhile: back of the queue (round-robin)
+                elif session._slot is not None:
+                    session._queued = True
+                    self._ready.append(session)
+                    self._cond.notify()
+
+    def stats(self):
+        """Throughput, worker utilization and per-session latency"""
+        with self._cond:
+            done = self._completions
+            span = done[-1] - done[0] if len(done) > 1 else 0.0
+            elapsed = max(time.monotonic() - self._started, 1e-9)
+            sessions = list(self._sessions)
+            stats = {
+                "workers": self.workers,
+                "sessions": len(sessions),
+                "busy_workers": self._busy,
+                "queued_sessions": len(self._ready),
+                "processed": self.processed,
+                "throughput_fps": (len(done) - 1) / span if span > 0 else 0.0,
+                "utilization": self._busy_time / (elapsed * self.workers),
+            }
+        stats["per_session"] = [s.stats() for s in sessions]
+        return stats
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+class LatestFrameWorker(ScheduledSession):
+    """Background inference on a private single-thread scheduler"""
+
+    def __init__(self, analyze, name="pose-worker", recycle=None):
+        super().__init__(InferenceScheduler(1, name), analyze, recycle)
+        self.scheduler._sessions.append(self)
+
+    def stop(self, timeout=1.0):
+        idle = super().stop(timeout)
+        self.scheduler.stop(timeout)
+        return idle
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(workers=DEFAULT_WORKERS):
+    """Process-wide scheduler shared by every session (created on first use)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = InferenceScheduler(workers)
+        return _scheduler
+
+
+def benchmark(engine, frame, sessions, seconds=5.0, fps=30, workers=None):
+    """Throughput and per-session latency with sessions streams at fps each"""
+    from pose_pipeline import PosePipeline
+    from frame_skip import AdaptiveFrameSkipper
+
+    scheduler = InferenceScheduler(workers or engine.max_graphs)
+    # Every submit is the same frame: without gate=False the motion gate would
+    # skip all but the first inference as duplicates
+    pipelines = [PosePipeline(engine, skipper=AdaptiveFrameSkipper(max_skip=0), roi=False,
+                              tuner=False, gate=False, filter=False) for _ in range(sessions)]
+    handles = [scheduler.open_session(lambda image, p=p: p.detect(image, time.perf_counter()))
+               for p in pipelines]
+
+    def feed(handle):
+        deadline = time.perf_counter() + seconds
+        next_frame = time.perf_counter()
+        while next_frame < deadline:
+            handle.submit(frame)
+            next_frame += 1.0 / fps
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+
+    before = engine.metrics()
+    feeders = [threading.Thread(target=feed, args=(h,)) for h in handles]
+    for thread in feeders:
+        thread.start()
+    for thread in feeders:
+        thread.join()
+    scheduler.stop()
+    stats = scheduler.stats()
+    after = engine.metrics()
+    checkouts = after["checkouts"] - before["checkouts"]
+    for p in pipelines:
+        p.close()
+
+    per_session = stats["per_session"]
+    return {
+        "sessions": sessions,
+        "throughput_fps": stats["throughput_fps"],
+        "per_session_fps": stats["processed"] / seconds / sessions,
+        "latency_p50_ms": float(np.mean([s["latency_p50_ms"] for s in per_session])),
+        "latency_p95_ms": float(np.max([s["latency_p95_ms"] for s in per_session])),
+        "drop_rate": float(np.mean([s["drop_rate"] for s in per_session])),
+        "utilization": stats["utilization"],
+        # Graph resets from sessions outnumbering graphs (lost tracking)
+        "handoff_rate": (after["handoffs"] - before["handoffs"]) / checkouts if checkouts else 0.0,
+    }
+
+
+# Benchmark: python async_pipeline.py [image_or_video] [max_sessions] [graphs]
+if __name__ == "__main__":
+    import cv2
+    from pose_engine import PoseEngine, DEFAULT_MAX_GRAPHS
+
+    frame = None
+    if len(sys.argv) > 1:
+        frame = cv2.imread(sys.argv[1])
+        if frame is None:
+            cap = cv2.VideoCapture(sys.argv[1])
+            ok, frame = cap.read()
+            cap.release()
+    if frame is None:
+        frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    max_sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    graphs = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_MAX_GRAPHS
+
+    engine = PoseEngine(graphs)
+    engine.warm(graphs)
+    sessions = 1
+    while sessions <= max_sessions:
+        r = benchmark(engine, frame, sessions)
+        print(f"{sessions:3d} sessions: {r['throughput_fps']:6.1f} inferences/s total, "
+              f"{r['per_session_fps']:5.1f}/s per session, latency p50 {r['latency_p50_ms']:.0f}ms "
+              f"p95 {r['latency_p95_ms']:.0f}ms, drop {100 * r['drop_rate']:.0f}%, "
+              f"utilization {100 * r['utilization']:.0f}%, "
+              f"graph handoffs {100 * r['handoff_rate']:.0f}%")
+        sessions *= 2
+    engine.close()
@@ -0,0 +1,214 @@
+import os
+import queue
+import sys
+import threading
+import time
+
+# Seconds before the same cue may play again for the same source
+DEFAULT_COOLDOWN = 1.5
+# POSE_AUDIO=null forces the silent backend (headless servers, tests)
+AUDIO_BACKEND = os.environ.get("POSE_AUDIO", "pygame")
+
+
+class PygameBackend:
+    """pygame.mixer output; Sound objects hold the decoded PCM in memory"""
+
+    def __init__(self):
+        import pygame
+
+        self.pygame = pygame
+        pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
+        pygame.mixer.set_num_channels(8)
+
+    def decode(self, path):
+        return self.pygame.mixer.Sound(path)
+
+    def play(self, sound):
+        sound.play()
+
+    def music_start(self, path, volume):
+        self.pygame.mixer.music.load(path)
+        self.pygame.mixer.music.set_volume(volume)
+        self.pygame.mixer.music.play(-1)
+
+    def music_stop(self):
+        self.pygame.mixer.music.stop()
+
+    def close(self):
+        self.pygame.mixer.quit()
+
+
+class NullBackend:
+    """Silent backend: decodes nothing, records what would have played"""
+
+    def __init__(self):
+        self.played = []
+        self.music = None
+
+    def decode(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        return path
+
+    def play(self, sound):
+        self.played.append(sound)
+
+    def music_start(self, path, volume):
+        self.music = path
+
+    def music_stop(self):
+        self.music = None
+
+    def close(self):
+        pass
+
+
+class AudioService:
+    """Process-wide sound cues played from one dispatcher thread.
+
+    load() decodes each file once per process, however many trackers ask
+    for it. play() only puts the cue on a queue, so the frame thread never
+    waits on the mixer. The dispatcher drains everything queued at once and
+    coalesces repeats: a cue within the cooldown of the last time it played
+    for the same source is dropped (measured on the timestamps passed to
+    play(), so a burst of queued cues collapses to one).
+    Background music commands go through the same queue, in order.
+    Without a backend, open_backend() creates one on the first load() or
+    start_music(), so a tracker that never plays sound never opens a mixer.
+    """
+
+    def __init__(self, backend=None, cooldown=DEFAULT_COOLDOWN, open_backend=NullBackend):
+        self.backend = backend
+        self.open_backend = open_backend
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._decoded = {}
+        self._cues = {}
+        self._last = {}
+        self._queue = queue.SimpleQueue()
+        self.music_playing = False
+
+        self.played = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="audio", daemon=True)
+        self._thread.start()
+
+    def load(self, cues):
+        """Register {name: path} cues, decoding files not seen before; False if one fails"""
+        with self._lock:
+            try:
+                for name, path in cues.items():
+                    sound = self._decoded.get(path)
+                    if sound is None:
+                        sound = self._decoded[path] = self._open().decode(path)
+                    self._cues[name] = sound
+            except Exception as e:
+                print(f"Could not load sound files: {e}")
+                return False
+        return True
+
+    def _open(self):
+        # Caller holds self._lock
+        if self.backend is None:
+            self.backend = self.open_backend()
+        return self.backend
+
+    def play(self, name, t=None, source=None):
+        """Queue cue name (timestamp t, default now) for source's cooldown"""
+        self._queue.put(("play", name, time.monotonic() if t is None else t, source))
+
+    def start_music(self, path, volume=0.3):
+        with self._lock:
+            self._open()
+        self.music_playing = True
+        self._queue.put(("music", path, volume, None))
+
+    def stop_music(self):
+        self.music_playing = False
+        self._queue.put(("music", None, 0.0, None))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for kind, arg, value, source in batch:
+                if kind == "close":
+                    return
+                try:
+                    if kind == "music":
+                        # stop_music() before any start_music(): nothing to stop
+                        if self.backend is None:
+                            continue
+                        if arg is None:
+                            self.backend.music_stop()
+                        else:
+                            self.backend.music_start(arg, value)
+                        continue
+                    key = (source, arg)
+                    last = self._last.get(key)
+                    sound = self._cues.get(arg)
+                    if sound is None or (last is not None and 0 <= value - last <= self.cooldown):
+                        self.coalesced += 1
+                        continue
+                    self._last[key] = value
+                    self.backend.play(sound)
+                    self.played += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Could not play sound: {e}")
+
+    def stats(self):
+        return {
+            "cues": len(self._cues),
+            "decoded_files": len(self._decoded),
+            "played": self.played,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
+
+    def close(self, timeout=1.0):
+        self._queue.put(("close", None, None, None))
+        self._thread.join(timeout)
+        if self.backend is not None:
+            self.backend.close()
+
+
+_audio = None
+_audio_lock = threading.Lock()
+
+
+def _open_backend():
+    """pygame if a mixer can be opened, else silent"""
+    if AUDIO_BACKEND != "null":
+        try:
+            return PygameBackend()
+        except Exception as e:
+            print(f"Warning: Could not initialize pygame mixer ({e}), audio disabled")
+    return NullBackend()
+
+
+def get_audio():
+    """Process-wide AudioService; the mixer is opened on the first load() / start_music()"""
+    global _audio
+    with _audio_lock:
+        if _audio is None:
+            _audio = AudioService(open_backend=_open_backend)
+        return _audio
+
+
+# Enqueue cost on the frame thread: python audio_service.py [cues]
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    service = AudioService(NullBackend())
+    service.load({"success": "audio/perfect.wav"})
+    start = time.perf_counter()
+    for i in range(n):
+        service.play("success", i / 30)
+    elapsed = time.perf_counter() - start
+    service.close()
+    print(f"play(): {1e6 * elapsed / n:.2f} us per cue, {service.stats()}")
@@ -0,0 +1,288 @@
+import csv
+import glob
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+from exercise_registry import TRACKERS, pick_exercise, tracker_class
+from frame_skip import AdaptiveFrameSkipper
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+
+# Frames decoded ahead of the tracker
+DEFAULT_READ_AHEAD = 8
+DEFAULT_OUT_DIR = "batch_output"
+
+EVENT_COLUMNS = ("rep", "counted", "start", "end", "duration",
+                 "min_angle", "max_angle", "hold_time", "failure")
+SUMMARY_COLUMNS = ("video", "exercise", "reps", "attempts", "frames", "duration",
+                   "seconds", "fps", "decode_wait", "gated", "error")
+
+
+def make_tracker(exercise, engine=None, sink=None):
+    """Tracker set up for offline use: inference on every frame, fixed model tier"""
+    tracker = tracker_class(exercise)(engine, sink)
+    # Skipping and tier switching react to processing speed, which offline
+    # has nothing to do with the video's frame rate
+    tracker.pipeline.skipper = AdaptiveFrameSkipper(max_skip=0)
+    tracker.pipeline.tuner = None
+    return tracker
+
+
+class FrameReader:
+    """Decodes a video on a background thread, up to read_ahead frames ahead.
+
+    Iterating yields (frame, t): the BGR frame and its presentation time in
+    seconds (frame index / fps when the container has no timestamps).
+    Frames are decoded into a ring of reused buffers, so a frame is only
+    valid until the next one is taken.
+    """
+
+    def __init__(self, path, read_ahead=DEFAULT_READ_AHEAD):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                     int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.error = None
+        # Time the consumer spent waiting for a decoded frame
+        self.wait = 0.0
+
+        # Queued frames + the one being decoded + the one the consumer holds
+        self._ring = [None] * (read_ahead + 2)
+        self._queue = queue.Queue(read_ahead)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="video-reader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        cap = self.cap
+        frame_time = 1.0 / self.fps
+        last = float("-inf")
+        i = 0
+        try:
+            while not self._stop.is_set():
+                slot = i % len(self._ring)
+                ok, frame = cap.read(self._ring[slot])
+                if not ok:
+                    break
+                self._ring[slot] = frame
+                t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                if not t > last:
+                    t = last + frame_time
+                last = t
+                i += 1
+                while not self._stop.is_set():
+                    try:
+                        self._queue.put((frame, t), timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+        except Exception as e:
+            self.error = e
+        finally:
+            if not self._stop.is_set():
+                self._queue.put(None)
+
+    def __iter__(self):
+        while True:
+            start = time.perf_counter()
+            item = self._queue.get()
+            self.wait += time.perf_counter() - start
+            if item is None:
+                if self.error:
+                    raise self.error
+                return
+            yield item
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.cap.release()
+
+
+def process_video(path, exercise, out_dir=None, name=None, annotate=False, record=False,
+                  read_ahead=DEFAULT_READ_AHEAD, engine=None):
+    """Run one video through its tracker, timed by the video's own timestamps.
+
+    Writes <name>.reps.csv (one row per finished rep, EVENT_COLUMNS; times
+    in seconds into the video) to out_dir, plus <name>.annotated.mp4 with
+    annotate and a <name>.lmr landmark recording with record. Returns a
+    summary dict (SUMMARY_COLUMNS).
+    """
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    # Per-rep rows come from the tracker's telemetry instead of the reps table
+    rows = []
+    tracker = make_tracker(exercise, engine, rows.append)
+    tracker.telemetry.stream = name
+
+    events = []
+    frames = 0
+    t = 0.0
+    reader = writer = None
+    start = time.perf_counter()
+    try:
+        reader = FrameReader(path, read_ahead)
+        if out_dir:
+            if annotate:
+                writer = cv2.VideoWriter(os.path.join(out_dir, f"{name}.annotated.mp4"),
+                                         cv2.VideoWriter_fourcc(*"mp4v"), reader.fps, reader.size)
+            if record:
+                tracker.start_recording(os.path.join(out_dir, f"{name}.lmr"))
+
+        for frame, t in reader:
+            image, _, _, _ = tracker.process_frame(frame, t)
+            frames += 1
+            if rows:
+                # A rep ends on the frame that finished it
+                for _, _, rep, counted, _, duration, low, high, hold, failure in rows:
+                    events.append((rep, int(counted), round(t - duration, 3), round(t, 3),
+                                   round(duration, 3), round(low, 1), round(high, 1),
+                                   round(hold, 3), failure or ""))
+                rows.clear()
+            if writer:
+                writer.write(image)
+    finally:
+        if reader:
+            reader.close()
+        if writer:
+            writer.release()
+        tracker.cleanup()
+    elapsed = time.perf_counter() - start
+
+    if out_dir:
+        with open(os.path.join(out_dir, f"{name}.reps.csv"), "w", newline="") as f:
+            out = csv.writer(f)
+            out.writerow(EVENT_COLUMNS)
+            out.writerows(events)
+
+    return {
+        "video": path,
+        "exercise": exercise,
+        "reps": tracker.count,
+        "attempts": len(events),
+        "frames": frames,
+        "duration": round(t, 3),
+        "seconds": round(elapsed, 3),
+        "fps": round(frames / elapsed, 1) if elapsed > 0 else 0.0,
+        "decode_wait": round(reader.wait, 3),
+        # Share of frames the motion gate answered without inference
+        "gated": round(tracker.pipeline.gate.skip_rate(), 3) if tracker.pipeline.gate else 0.0,
+        "error": "",
+    }
+
+
+def find_videos(paths):
+    """(path, name) for every video file in paths (folders searched recursively)"""
+    videos = []
+    for arg in paths:
+        if os.path.isdir(arg):
+            found = sorted(p for p in glob.glob(os.path.join(arg, "**", "*"), recursive=True)
+                           if p.lower().endswith(VIDEO_EXTENSIONS))
+            for p in found:
+                rel = os.path.splitext(os.path.relpath(p, arg))[0]
+                videos.append((p, rel.replace(os.sep, "__")))
+        else:
+            videos.append((arg, os.path.splitext(os.path.basename(arg))[0]))
+    return videos
+
+
+def run(paths, exercise=None, out_dir=DEFAULT_OUT_DIR, workers=None, annotate=False,
+        record=False):
+    """Process every video in paths, one per worker process; returns the summaries"""
+    jobs = []
+    for path, name in find_videos(paths):
+        # Closest match first: the name below the folder given, then the full path
+        ex = exercise or pick_exercise(name) or pick_exercise(path)
+        if ex is None:
+            print(f"skip {path}: no exercise in its name (use --exercise)")
+            continue
+        jobs.append((path, ex, out_dir, name, annotate, record))
+    if not jobs:
+        return []
+    os.makedirs(out_dir, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+
+    results = []
+    start = time.perf_counter()
+
+    def done(result):
+        results.append(result)
+        if result["error"]:
+            print(f"FAIL {result['video']}: {result['error']}")
+        else:
+            print(f"{result['video']}: {result['exercise']} reps {result['reps']} "
+                  f"({result['attempts']} attempts), {result['frames']} frames / "
+                  f"{result['duration']:.1f}s in {result['seconds']:.1f}s = {result['fps']:.0f} fps")
+
+    def failure_row(job, e):
+        return dict.fromkeys(SUMMARY_COLUMNS, 0) | {"video": job[0], "exercise": job[1],
+                                                    "error": repr(e)}
+
+    if workers == 1:
+        # Nothing to spawn for a single worker
+        for job in jobs:
+            try:
+                done(process_video(*job))
+            except Exception as e:
+                done(failure_row(job, e))
+    else:
+        # spawn: MediaPipe graphs and threads don't survive fork
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(process_video, *job): job for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    done(future.result())
+                except Exception as e:
+                    done(failure_row(futures[future], e))
+    elapsed = time.perf_counter() - start
+
+    results.sort(key=lambda r: r["video"])
+    with open(os.path.join(out_dir, "summary.csv"), "w", newline="") as f:
+        out = csv.DictWriter(f, SUMMARY_COLUMNS)
+        out.writeheader()
+        out.writerows(results)
+
+    frames = sum(r["frames"] for r in results)
+    seconds = sum(r["duration"] for r in results)
+    failed = sum(bool(r["error"]) for r in results)
+    print(f"{len(results)} videos ({failed} failed), {workers} workers: {frames} frames "
+          f"({seconds:.0f}s of video) in {elapsed:.1f}s = {frames / max(elapsed, 1e-9):.0f} fps, "
+          f"{seconds / max(elapsed, 1e-9):.1f}x real time")
+    return results
+
+
+# Offline batch: python batch_videos.py videos/ [more files or folders] [--exercise NAME]
+#                [--out DIR] [--workers N] [--annotate] [--record]
+# The tracker is picked from each video's path (folder or file name containing
+# e.g. "curl", "press" or "lateral") unless --exercise is given. Writes
+# <video>.reps.csv per video and summary.csv to --out (default batch_output).
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    flags = {}
+    for flag in ("--annotate", "--record"):
+        flags[flag] = flag in args
+        if flags[flag]:
+            args.remove(flag)
+    options = {"--exercise": None, "--out": DEFAULT_OUT_DIR, "--workers": None}
+    for option in options:
+        if option in args:
+            i = args.index(option)
+            options[option] = args[i + 1]
+            del args[i:i + 2]
+    if not args:
+        sys.exit("usage: python batch_videos.py videos/ [--exercise NAME] [--out DIR] "
+                 "[--workers N] [--annotate] [--record]")
+    if options["--exercise"] and options["--exercise"] not in TRACKERS:
+        sys.exit(f"unknown exercise {options['--exercise']!r} (one of {', '.join(TRACKERS)})")
+
+    results = run(args, options["--exercise"], options["--out"],
+                  int(options["--workers"]) if options["--workers"] else None,
+                  flags["--annotate"], flags["--record"])
+    sys.exit(1 if any(r["error"] for r in results) else 0)
@@ -0,0 +1,135 @@
+import collections
+import threading
+import time
+
+import numpy as np
+from pose_engine import get_engine
+
+TIER_NAMES = {0: "lite", 1: "full", 2: "heavy"}
+
+# Rough cost of the next tier up relative to the current one on CPU
+UPGRADE_COST = {0: 1.6, 1: 3.5}
+
+
+class ComplexityTuner:
+    """Pick the MediaPipe pose graph (lite / full / heavy) per stream at runtime.
+
+    Watches the achieved inference rate and p95 inference latency over a
+    sliding window. It steps down a tier when the stream can't hold real time
+    and steps up when the next tier is expected to fit comfortably in the
+    frame budget. Hysteresis comes from the gap between those thresholds, a
+    minimum dwell time after every change, and a cooldown before retrying a
+    tier that was just abandoned.
+
+    The new graph is loaded on a background thread; poll() hands over the
+    engine once it is ready, so the frame thread never waits for a model load.
+    """
+
+    def __init__(self, pose_options=None, start_tier=1, target_fps=30, min_fps=15,
+                 window=60, min_dwell=5.0, retry_cooldown=60.0, max_graphs=None, factory=None):
+        self.pose_options = dict(pose_options or {})
+        self.pose_options.pop("model_complexity", None)
+        self.tier = start_tier
+        self.budget = 1.0 / target_fps
+        self.min_fps = min_fps
+        self.window = window
+        self.min_dwell = min_dwell
+        self.retry_cooldown = retry_cooldown
+        self.max_graphs = max_graphs
+        # get_engine(**options)-style constructor for the other tiers
+        self.factory = factory or get_engine
+
+        self.latencies = collections.deque(maxlen=window)
+        self.times = collections.deque(maxlen=window)
+        self._samples = 0
+        self.last_change = None
+        self.blocked_until = {}
+        self.unavailable = set()
+        self.history = []
+
+        self._lock = threading.Lock()
+        self._loading = False
+        self._ready = None
+
+    @classmethod
+    def for_engine(cls, engine, **kwargs):
+        """Tuner starting at engine's tier, keeping its other Pose options and backend"""
+        return cls(engine.options, engine.options.get("model_complexity", 1),
+                   max_graphs=engine.max_graphs, factory=engine.sibling, **kwargs)
+
+    def engine_for(self, tier):
+        kwargs = {} if self.max_graphs is None else {"max_graphs": self.max_graphs}
+        return self.factory(model_complexity=tier, **kwargs, **self.pose_options)
+
+    def stats(self):
+        """Achieved inference rate (1/s) and p95 latency (s) over the window"""
+        if len(self.times) < 2:
+            return 0.0, 0.0
+        span = self.times[-1] - self.times[0]
+        rate = (len(self.times) - 1) / span if span > 0 else 0.0
+        return rate, float(np.percentile(self.latencies, 95))
+
+    def record(self, seconds, now):
+        """Record one inference taking seconds at monotonic time now"""
+        self.latencies.append(seconds)
+        self.times.append(now)
+        self._samples += 1
+        if self.last_change is None:
+            self.last_change = now
+        # Re-evaluate every 10 inferences once the window is full
+        if self._loading or len(self.latencies) < self.window or \
+           now - self.last_change < self.min_dwell or self._samples % 10:
+            return
+
+        rate, p95 = self.stats()
+        if p95 > self.budget and rate < self.min_fps and \
+           self.tier > 0 and self.tier - 1 not in self.unavailable:
+            self._change(self.tier - 1,
+                         f"p95 {1000 * p95:.0f}ms > {1000 * self.budget:.0f}ms budget, "
+                         f"{rate:.1f} inferences/s < {self.min_fps}")
+        elif self.tier < 2 and self.tier + 1 not in self.unavailable and \
+             now >= self.blocked_until.get(self.tier + 1, 0.0) and \
+             p95 * UPGRADE_COST[self.tier] < 0.8 * self.budget:
+            self._change(self.tier + 1,
+                         f"p95 {1000 * p95:.0f}ms leaves headroom for "
+                         f"{TIER_NAMES[self.tier + 1]} in {1000 * self.budget:.0f}ms budget")
+
+    def _change(self, tier, reason):
+        self._loading = True
+        threading.Thread(target=self._load, args=(self.tier, tier, reason),
+                         name="pose-tier-load", daemon=True).start()
+
+    def _load(self, old, tier, reason):
+        try:
+            engine = self.engine_for(tier)
+            engine.warm()
+        except Exception as e:
+            self.unavailable.add(tier)
+            print(f"[pose tuner] {TIER_NAMES[tier]} graph unavailable, "
+                  f"staying on {TIER_NAMES[old]}: {e}")
+            with self._lock:
+                self._loading = False
+            return
+        with self._lock:
+            self._ready = (engine, tier, reason)
+
+    def poll(self, now):
+        """The engine to switch to if a tier change has finished loading, else None"""
+        if self._ready is None:
+            return None
+        with self._lock:
+            engine, tier, reason = self._ready
+            self._ready = None
+            self._loading = False
+
+        if tier < self.tier:
+            # Don't climb straight back into the tier we just left
+            self.blocked_until[self.tier] = now + self.retry_cooldown
+        self.history.append((time.time(), self.tier, tier, reason))
+        print(f"[pose tuner] model complexity {self.tier} ({TIER_NAMES[self.tier]}) -> "
+              f"{tier} ({TIER_NAMES[tier]}): {reason}")
+        self.tier = tier
+        self.last_change = now
+        self.latencies.clear()
+        self.times.clear()
+        return engine
@@ -1,34 +1,662 @@
+import atexit
+import os
+import queue
 import sqlite3
-from datetime import datetime
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 
-def init_db():
-    conn = sqlite3.connect('workout_history.db')
-    c = conn.cursor()
-    c.execute('''
+# Next to this file, not the working directory (override with WORKOUT_DB)
+DB_PATH = os.environ.get('WORKOUT_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                    'workout_history.db'))
+# Read connections kept open alongside the single writer
+DEFAULT_READERS = 2
+
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',       # readers don't block the writer (and vice versa)
+    'PRAGMA synchronous=NORMAL',     # fsync at checkpoints, not on every commit (safe with WAL)
+    'PRAGMA busy_timeout=5000',      # wait for other processes' locks instead of failing
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-8000',       # 8 MB page cache
+)
+
+
+class Database:
+    """Long-lived connections to one SQLite file, shared by every thread.
+
+    Writes go through a single connection serialized by a lock (SQLite only
+    ever has one writer), each call in its own transaction; write_many()
+    sends a whole batch through executemany in one transaction, so a batch
+    costs one commit. Reads borrow one of a small pool of connections, which
+    WAL lets run concurrently with the writer. Safe to use from the
+    Streamlit script thread and the WebRTC callback threads at once.
+    """
+
+    def __init__(self, path=DB_PATH, readers=DEFAULT_READERS):
+        self.path = path
+        self._lock = threading.Lock()
+        self._writer = self._connect()
+        self._readers = queue.LifoQueue()
+        self._all = [self._writer]
+        for _ in range(readers):
+            conn = self._connect()
+            self._readers.put(conn)
+            self._all.append(conn)
+        self._closed = False
+
+    def _connect(self):
+        # Autocommit mode: transactions are opened explicitly in write()/write_many()
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Writer connection inside BEGIN ... COMMIT (rolled back on error)"""
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError('Database is closed')
+            conn = self._writer
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def write(self, sql, params=()):
+        with self.transaction() as conn:
+            return conn.execute(sql, params).lastrowid
+
+    def write_many(self, sql, rows):
+        """executemany in one transaction; returns the number of rows written"""
+        with self.transaction() as conn:
+            return conn.executemany(sql, rows).rowcount
+
+    @contextmanager
+    def reader(self):
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def query(self, sql, params=()):
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for conn in self._all:
+                conn.close()
+
+
+# Summary tables: (table, period column, SQL period of a timestamp). The
+# week is keyed by its Monday.
+AGGREGATES = (
+    ('daily_totals', 'day', 'date({ts})'),
+    ('weekly_totals', 'week', "date({ts}, 'weekday 0', '-6 days')"),
+)
+# Recompute every summary row from sessions
+AGGREGATE_REBUILD = tuple(sql for table, period, key in AGGREGATES for sql in (
+    f'DELETE FROM {table}',
+    f'''
+    INSERT INTO {table} ({period}, exercise_name, sessions, reps, best_set)
+    SELECT {key.format(ts='timestamp')}, exercise_name, count(*),
+           coalesce(sum(reps), 0), coalesce(max(reps), 0)
+    FROM sessions
+    WHERE timestamp IS NOT NULL AND exercise_name IS NOT NULL
+    GROUP BY 1, 2
+    ''',
+))
+
+# Schema history: MIGRATIONS[i] takes a database from user_version i to i + 1.
+# Append new steps; never edit one that has shipped.
+MIGRATIONS = (
+    # 1: original table (databases created before versioning already have it)
+    ('''
         CREATE TABLE IF NOT EXISTS sessions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             exercise_name TEXT,
             reps INTEGER,
             timestamp DATETIME
         )
-    ''')
-    conn.commit()
-    conn.close()
-
-def save_session(exercise_name, reps):
-    conn = sqlite3.connect('workout_history.db')
-    c = conn.cursor()
-    c.execute('''
+    ''',),
+    # 2: history queries (newest first, optionally one exercise / date range)
+    (
+        'CREATE INDEX IF NOT EXISTS idx_sessions_exercise_time ON sessions (exercise_name, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_sessions_time ON sessions (timestamp)',
+    ),
+    # 3: per-rep telemetry (rep_telemetry.RepTelemetry via the write-behind RepLog)
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS reps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            stream TEXT,
+            exercise_name TEXT,
+            rep INTEGER,
+            counted INTEGER,
+            started DATETIME,
+            duration REAL,
+            min_angle REAL,
+            max_angle REAL,
+            hold_time REAL,
+            failure TEXT
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_reps_stream ON reps (stream, started)',
+        'CREATE INDEX IF NOT EXISTS idx_reps_exercise_time ON reps (exercise_name, started)',
+    ),
+    # 4: per-day / per-week totals kept up to date by triggers, backfilled once
+    (
+        *(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            {period} TEXT NOT NULL,
+            exercise_name TEXT NOT NULL,
+            sessions INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            best_set INTEGER NOT NULL,
+            PRIMARY KEY ({period}, exercise_name)
+        ) WITHOUT ROWID
+        ''' for table, period, _ in AGGREGATES),
+        *(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_on_insert AFTER INSERT ON sessions
+        WHEN NEW.timestamp IS NOT NULL AND NEW.exercise_name IS NOT NULL
+        BEGIN
+            INSERT INTO {table} ({period}, exercise_name, sessions, reps, best_set)
+            VALUES ({key.format(ts='NEW.timestamp')}, NEW.exercise_name, 1,
+                    coalesce(NEW.reps, 0), coalesce(NEW.reps, 0))
+            ON CONFLICT ({period}, exercise_name) DO UPDATE SET
+                sessions = sessions + 1,
+                reps = reps + excluded.reps,
+                best_set = max(best_set, excluded.best_set);
+        END
+        ''' for table, period, key in AGGREGATES),
+        *AGGREGATE_REBUILD,
+    ),
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+REP_COLUMNS = ('stream', 'exercise_name', 'rep', 'counted', 'started', 'duration',
+               'min_angle', 'max_angle', 'hold_time', 'failure')
+
+# Rep log: queued reps before producers have to wait, rows per transaction,
+# longest a rep waits before it is written (seconds)
+REP_QUEUE_SIZE = 10000
+REP_BATCH = 500
+REP_FLUSH_INTERVAL = 1.0
+
+# Rows per page / per streamed chunk
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_CHUNK = 500
+
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_db():
+    """Process-wide Database for DB_PATH (opened and migrated on first use)"""
+    global _db
+    with _db_lock:
+        if _db is None:
+            _db = Database(DB_PATH)
+            migrate(_db)
+            atexit.register(_db.close)
+        return _db
+
+
+def migrate(db):
+    """Bring db up to SCHEMA_VERSION; returns the version it started from"""
+    with db.transaction() as conn:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f'{db.path} has schema version {version}, this code knows '
+                               f'{SCHEMA_VERSION}')
+        for step in range(version, SCHEMA_VERSION):
+            for sql in MIGRATIONS[step]:
+                conn.execute(sql)
+        # PRAGMA doesn't take parameters
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION:d}')
+    return version
+
+
+def init_db():
+    get_db()
+
+
+def save_session(exercise_name, reps, timestamp=None):
+    return get_db().write('''
+        INSERT INTO sessions (exercise_name, reps, timestamp)
+        VALUES (?, ?, ?)
+    ''', (exercise_name, reps, timestamp or datetime.now()))
+
+
+def save_sessions(sessions):
+    """Insert many (exercise_name, reps[, timestamp]) rows in one transaction"""
+    now = datetime.now()
+    rows = [(s[0], s[1], s[2] if len(s) > 2 and s[2] else now) for s in sessions]
+    return get_db().write_many('''
         INSERT INTO sessions (exercise_name, reps, timestamp)
         VALUES (?, ?, ?)
-    ''', (exercise_name, reps, datetime.now()))
-    conn.commit()
-    conn.close()
-
-def get_history():
-    conn = sqlite3.connect('workout_history.db')
-    c = conn.cursor()
-    c.execute('SELECT exercise_name, reps, timestamp FROM sessions ORDER BY timestamp DESC')
-    data = c.fetchall()
-    conn.close()
-    return data
\ No newline at end of file
+    ''', rows)
+
+
+class RepLog:
+    """Write-behind queue for the reps table.
+
+    put() never touches SQLite and never waits: it appends to a bounded
+    in-memory queue, or rejects (and counts) the rep if the writer has fallen
+    REP_QUEUE_SIZE reps behind. A background thread writes whatever has
+    queued up, up to batch rows per executemany transaction, at least every
+    interval seconds. close() (also run at exit) stops taking reps and
+    waits up to its timeout for everything still queued to be written.
+    Rejected reps were never queued; rows whose write failed were, and
+    count as done for flush(). The counters are updated under one lock, as
+    several frame threads may put() at once.
+    """
+
+    def __init__(self, db=None, maxsize=REP_QUEUE_SIZE, batch=REP_BATCH,
+                 interval=REP_FLUSH_INTERVAL):
+        self.db = db
+        self.batch = batch
+        self.interval = interval
+        self._queue = queue.Queue(maxsize)
+        self._closed = False
+        self._stop = threading.Event()
+        # Guards the counters; notified after every batch
+        self._flushed = threading.Condition()
+
+        self.queued = 0
+        self.written = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name='rep-log', daemon=True)
+        self._thread.start()
+
+    def put(self, rep):
+        with self._flushed:
+            if self._closed:
+                self.rejected += 1
+                return False
+            try:
+                self._queue.put_nowait(rep)
+            except queue.Full:
+                self.rejected += 1
+                return False
+            self.queued += 1
+        return True
+
+    def _run(self):
+        sql = (f'INSERT INTO reps ({", ".join(REP_COLUMNS)}) '
+               f'VALUES ({", ".join("?" * len(REP_COLUMNS))})')
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                row = self._queue.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            # Everything queued up to now (None is close()'s wake-up), one batch at a time
+            rows = []
+            while True:
+                if row is not None:
+                    rows.append(row)
+                if len(rows) >= self.batch:
+                    break
+                try:
+                    row = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if rows:
+                self._write(sql, rows)
+
+    def _write(self, sql, rows):
+        try:
+            (self.db or get_db()).write_many(sql, rows)
+            ok = True
+        except sqlite3.Error as e:
+            print(f'Could not write {len(rows)} reps: {e}')
+            ok = False
+        with self._flushed:
+            if ok:
+                self.written += len(rows)
+                self.batches += 1
+            else:
+                self.failed += len(rows)
+            self._flushed.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Wait until everything queued so far is written"""
+        deadline = time.monotonic() + timeout
+        with self._flushed:
+            target = self.queued
+            while self.written + self.failed < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._flushed.wait(min(remaining, self.interval))
+        return True
+
+    def close(self, timeout=10.0):
+        with self._flushed:
+            if self._closed:
+                return
+            self._closed = True
+        self._stop.set()
+        # Wake the writer if it is idle; with a full queue it is busy and sees _stop
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._flushed:
+            return {
+                'queued': self.queued,
+                'pending': self._queue.qsize(),
+                'written': self.written,
+                'rejected': self.rejected,
+                'failed': self.failed,
+                'batches': self.batches,
+            }
+
+
+_rep_log = None
+
+
+def get_rep_log():
+    """Process-wide RepLog writing to get_db() (started on first use, flushed at exit)"""
+    global _rep_log
+    # Database first, so its atexit close runs after the log's final flush
+    get_db()
+    with _db_lock:
+        if _rep_log is None:
+            _rep_log = RepLog()
+            # atexit runs last-registered first: reps are written before the db closes
+            atexit.register(_rep_log.close)
+        return _rep_log
+
+
+def get_reps(stream=None, exercise=None, limit=DEFAULT_PAGE_SIZE):
+    """Newest reps as dicts (REP_COLUMNS), for one stream or exercise"""
+    where = []
+    params = []
+    if stream is not None:
+        where.append('stream = ?')
+        params.append(stream)
+    if exercise is not None:
+        where.append('exercise_name = ?')
+        params.append(exercise)
+    sql = f'SELECT {", ".join(REP_COLUMNS)} FROM reps'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY started DESC, id DESC LIMIT ?'
+    rows = get_db().query(sql, params + [limit])
+    return [dict(zip(REP_COLUMNS, row)) for row in rows]
+
+
+def rebuild_aggregates(db=None):
+    """Recompute daily / weekly totals from sessions (backfill or repair)"""
+    with (db or get_db()).transaction() as conn:
+        for sql in AGGREGATE_REBUILD:
+            conn.execute(sql)
+
+
+def _totals(table, period, start, end, exercise):
+    where = []
+    params = []
+    if start is not None:
+        where.append(f'{period} >= ?')
+        params.append(_bound(start))
+    if end is not None:
+        where.append(f'{period} < ?')
+        params.append(_bound(end))
+    if exercise is not None:
+        where.append('exercise_name = ?')
+        params.append(exercise)
+    sql = f'SELECT {period}, exercise_name, sessions, reps, best_set FROM {table}'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += f' ORDER BY {period}, exercise_name'
+    return get_db().query(sql, params)
+
+
+def get_daily_totals(start=None, end=None, exercise=None):
+    """(day, exercise_name, sessions, reps, best_set) for start <= day < end.
+
+    Read from the summary table, so the cost depends on the days asked for,
+    not on how many sessions were logged.
+    """
+    return _totals('daily_totals', 'day', start and _day(start), end and _day(end), exercise)
+
+
+def get_weekly_totals(start=None, end=None, exercise=None):
+    """(week, exercise_name, sessions, reps, best_set); week is its Monday"""
+    return _totals('weekly_totals', 'week', start and _monday(start), end and _day(end), exercise)
+
+
+def _day(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _monday(value):
+    value = _day(value)
+    if isinstance(value, date):
+        return value - timedelta(days=value.weekday())
+    return value
+
+
+def _bound(value):
+    # Timestamps are stored as 'YYYY-MM-DD HH:MM:SS[.ffffff]' text, which sorts
+    # chronologically; a date compares as its midnight
+    return str(value)
+
+
+def _history_query(exercise, start, end, after, limit):
+    where = []
+    params = []
+    if exercise is not None:
+        where.append('exercise_name = ?')
+        params.append(exercise)
+    if start is not None:
+        where.append('timestamp >= ?')
+        params.append(_bound(start))
+    if end is not None:
+        where.append('timestamp < ?')
+        params.append(_bound(end))
+    if after is not None:
+        # Keyset: continue strictly below the last row seen (ties broken by id)
+        where.append('(timestamp, id) < (?, ?)')
+        params += [after[0], after[1]]
+    sql = 'SELECT id, exercise_name, reps, timestamp FROM sessions'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY timestamp DESC, id DESC LIMIT ?'
+    params.append(limit)
+    return sql, params
+
+
+def get_history_page(limit=DEFAULT_PAGE_SIZE, after=None, exercise=None, start=None, end=None):
+    """One page of (exercise_name, reps, timestamp), newest first.
+
+    Filters: exercise name, start <= timestamp < end (datetime, date or
+    string). Pass the returned cursor as after= for the next page; it is
+    None after the last page. Each page is an index range scan, so its cost
+    doesn't grow with the history.
+    """
+    sql, params = _history_query(exercise, start, end, after, limit)
+    rows = get_db().query(sql, params)
+    cursor = (rows[-1][3], rows[-1][0]) if len(rows) == limit else None
+    return [row[1:] for row in rows], cursor
+
+
+def iter_history(exercise=None, start=None, end=None, chunk=DEFAULT_CHUNK):
+    """Stream every matching row, newest first, chunk rows in memory at a time"""
+    after = None
+    while True:
+        rows, after = get_history_page(chunk, after, exercise, start, end)
+        yield from rows
+        if after is None:
+            return
+
+
+def get_history(exercise=None, start=None, end=None):
+    return list(iter_history(exercise, start, end))
+
+
+def export_csv(file, exercise=None, start=None, end=None):
+    """Write matching rows to a CSV file object or path without loading them all"""
+    import csv
+
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'w', newline='') as f:
+            return export_csv(f, exercise, start, end)
+    writer = csv.writer(file)
+    writer.writerow(('exercise_name', 'reps', 'timestamp'))
+    count = 0
+    for row in iter_history(exercise, start, end):
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def benchmark(rows=2000, batch=100):
+    """Inserts/s: a connection per insert (old code) vs persistent connection vs batches"""
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        def fresh(name):
+            db = Database(os.path.join(folder, f'{name}.db'))
+            migrate(db)
+            return db
+
+        sql = 'INSERT INTO sessions (exercise_name, reps, timestamp) VALUES (?, ?, ?)'
+        row = ('Bicep Curl', 10, datetime.now())
+
+        # Old behaviour: default journal, connect + insert + commit + close every row
+        path = os.path.join(folder, 'per_call.db')
+        fresh('per_call').close()
+        conn = sqlite3.connect(path)
+        conn.execute('PRAGMA journal_mode=DELETE')
+        conn.close()
+        start = time.perf_counter()
+        for _ in range(rows):
+            conn = sqlite3.connect(path)
+            conn.execute(sql, row)
+            conn.commit()
+            conn.close()
+        results['connection per insert'] = rows / (time.perf_counter() - start)
+
+        db = fresh('persistent')
+        start = time.perf_counter()
+        for _ in range(rows):
+            db.write(sql, row)
+        results['persistent + WAL'] = rows / (time.perf_counter() - start)
+        db.close()
+
+        db = fresh('batched')
+        start = time.perf_counter()
+        for _ in range(0, rows, batch):
+            db.write_many(sql, [row] * batch)
+        results[f'executemany x{batch}'] = rows / (time.perf_counter() - start)
+        db.close()
+
+        # Same, with 8 threads writing at once (Streamlit + WebRTC threads)
+        db = fresh('threads')
+        threads = [threading.Thread(target=lambda: [db.write(sql, row) for _ in range(rows // 8)])
+                   for _ in range(8)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results['persistent + WAL, 8 threads'] = rows // 8 * 8 / (time.perf_counter() - start)
+        db.close()
+    return results
+
+
+def read_benchmark(rows=200_000, pages=100):
+    """ms per history page: full ORDER BY + fetchall (old get_history) vs indexed keyset pages"""
+    global _db
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        db = Database(os.path.join(folder, 'history.db'))
+        exercises = ('Bicep Curl', 'Overhead Press', 'Lateral Raise')
+        base = datetime(2020, 1, 1)
+        data = [(exercises[i % 3], i % 20, base + timedelta(minutes=7 * i)) for i in range(rows)]
+        # Old schema first, filled, then migrated the way an existing database would be
+        for sql in MIGRATIONS[0]:
+            db.write(sql)
+        db.write_many('INSERT INTO sessions (exercise_name, reps, timestamp) VALUES (?, ?, ?)', data)
+
+        start = time.perf_counter()
+        db.query('SELECT exercise_name, reps, timestamp FROM sessions ORDER BY timestamp DESC')
+        results['old get_history (whole table)'] = 1000 * (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        migrate(db)
+        results['migration (indexes, totals)'] = 1000 * (time.perf_counter() - start)
+
+        saved, _db = _db, db
+        try:
+            for name, filters in (('page', {}), ('page, one exercise', {'exercise': 'Lateral Raise'}),
+                                  ('page, one month', {'start': date(2022, 3, 1),
+                                                       'end': date(2022, 4, 1)})):
+                after = None
+                start = time.perf_counter()
+                for _ in range(pages):
+                    _, after = get_history_page(DEFAULT_PAGE_SIZE, after, **filters)
+                    if after is None:
+                        break
+                results[name] = 1000 * (time.perf_counter() - start) / pages
+
+            # Progress dashboard: last 30 days and 12 weeks of totals
+            last = data[-1][2].date()
+            get_daily_totals(last, last + timedelta(days=1))   # warm the reader's schema / cache
+            start = time.perf_counter()
+            db.query("SELECT date(timestamp), exercise_name, count(*), sum(reps), max(reps) "
+                     "FROM sessions GROUP BY 1, 2")
+            results['dashboard by re-aggregating sessions'] = 1000 * (time.perf_counter() - start)
+            start = time.perf_counter()
+            get_daily_totals(last - timedelta(days=30), last + timedelta(days=1))
+            get_weekly_totals(last - timedelta(weeks=12), last + timedelta(days=1))
+            results['dashboard from summary tables'] = 1000 * (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            n = sum(1 for _ in iter_history())
+            results[f'iter_history ({n} rows streamed)'] = 1000 * (time.perf_counter() - start)
+        finally:
+            _db = saved
+            db.close()
+    return results
+
+
+# Write / read benchmarks: python database.py [rows] [batch]
+# Migrate the history database:  python database.py migrate
+# Export it (streamed):          python database.py export out.csv [exercise]
+# Recompute the summary tables:  python database.py rebuild-aggregates
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args and args[0] == 'rebuild-aggregates':
+        rebuild_aggregates()
+        print(f'{get_db().path}: daily / weekly totals rebuilt')
+    elif args and args[0] == 'migrate':
+        db = get_db()
+        print(f'{db.path}: schema version {SCHEMA_VERSION}')
+    elif args and args[0] == 'export':
+        count = export_csv(args[1], args[2] if len(args) > 2 else None)
+        print(f'{count} sessions written to {args[1]}')
+    else:
+        rows = int(args[0]) if args else 2000
+        batch = int(args[1]) if len(args) > 1 else 100
+        for name, rate in benchmark(rows, batch).items():
+            print(f'{name:32s} {rate:10.0f} inserts/s')
+        for name, ms in read_benchmark().items():
+            print(f'{name:32s} {ms:10.2f} ms')
@@ -0,0 +1,43 @@
+import importlib
+
+# exercise -> (module, tracker class, words that pick it from a video's path).
+# Modules are imported on first use: each tracker pulls in cv2, the pose
+# engine, audio and the database, so loading one shouldn't load the others.
+TRACKERS = {
+    "biceps_curl": ("BicepCurl", "BicepsCurlTracker", ("curl", "bicep")),
+    "overhead_press": ("overhead_press", "OverheadPressTracker", ("overhead", "press", "ohp")),
+    "lateral_raise": ("LateralRaise", "LateralRaiseTracker", ("lateral", "raise")),
+}
+
+# Streamlit app exercises (quick counters in exercises.APP_EXERCISES). The app
+# only needs their names to draw the sidebar; the specs, and numpy with them,
+# are imported when the first frame is counted. exercises.py checks on import
+# that this matches its keys.
+APP_EXERCISES = ("Bicep Curl", "Overhead Press", "Lateral Raise")
+
+_classes = {}
+
+
+def pick_exercise(path):
+    """Tracker for a video from the first keyword found in its path, or None"""
+    name = path.lower()
+    for exercise, (_, _, keywords) in TRACKERS.items():
+        if any(word in name for word in keywords):
+            return exercise
+    return None
+
+
+def tracker_class(exercise):
+    """Tracker class for exercise, importing its module on first use"""
+    cls = _classes.get(exercise)
+    if cls is None:
+        module, name, _ = TRACKERS[exercise]
+        cls = _classes[exercise] = getattr(importlib.import_module(module), name)
+    return cls
+
+
+def app_spec(name):
+    """ExerciseSpec of app exercise name, importing exercises on first use"""
+    from exercises import APP_EXERCISES as specs
+
+    return specs[name]
@@ -0,0 +1,140 @@
+import numpy as np
+import exercise_registry
+from landmark_buffer import X, Y
+from pose_angles import (L_ELBOW_ANGLE, R_ELBOW_ANGLE, L_SHOULDER_ANGLE, R_SHOULDER_ANGLE,
+                         LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW,
+                         LEFT_WRIST, RIGHT_WRIST)
+from rep_engine import (ExerciseSpec, Transition as T, Fault, ANY, STARTED, FAILED, REACHED,
+                        ALL_FLAGS, WARNING)
+
+
+# --- Form checks: (N, 33, 4) landmarks, (N,) metric -> bool per session ---
+
+def narrow_grip(data, metric):
+    """Wrists closer than 70% of shoulder width"""
+    wrists = np.abs(data[:, LEFT_WRIST, X] - data[:, RIGHT_WRIST, X])
+    shoulders = np.abs(data[:, LEFT_SHOULDER, X] - data[:, RIGHT_SHOULDER, X])
+    return wrists < 0.7 * shoulders
+
+
+def elbows_above_shoulders(data, metric, margin=0.05):
+    return (data[:, LEFT_ELBOW, Y] < data[:, LEFT_SHOULDER, Y] - margin) | \
+           (data[:, RIGHT_ELBOW, Y] < data[:, RIGHT_SHOULDER, Y] - margin)
+
+
+def wrist_drift(data, metric, limit=0.15):
+    """Wrists drifting sideways off the elbows"""
+    return (np.abs(data[:, LEFT_WRIST, X] - data[:, LEFT_ELBOW, X]) > limit) | \
+           (np.abs(data[:, RIGHT_WRIST, X] - data[:, RIGHT_ELBOW, X]) > limit)
+
+
+def _finish(src, dst, op, threshold, success, miss):
+    """Rep-end rows: count a clean rep, otherwise say why it didn't count"""
+    return (
+        T(src, dst, op, threshold, requires=STARTED | REACHED, forbids=FAILED,
+          clears=ALL_FLAGS, count=True, event="success", feedback=success),
+        T(src, dst, op, threshold, forbids=REACHED, clears=ALL_FLAGS,
+          feedback=miss, status=WARNING),
+        T(src, dst, op, threshold, requires=FAILED, clears=ALL_FLAGS,
+          feedback="Failed: {reason}", status=WARNING),
+        T(src, dst, op, threshold, clears=ALL_FLAGS),
+    )
+
+
+# Average of both elbows; 95 / 150 degree thresholds, 0.5s hold at the top
+OVERHEAD_PRESS = ExerciseSpec(
+    "Overhead Press", angles=(L_ELBOW_ANGLE, R_ELBOW_ANGLE),
+    states=("down", "pressing", "up", "lowering"),
+    faults=[
+        Fault("narrow_grip", narrow_grip, "Too narrow - widen grip", reason="bad_form",
+              event="bad_form", feedback="Fix form: Too narrow - widen grip", keep_reached=True),
+    ],
+    transitions=[
+        T("down", "pressing", ">", 95, sets=STARTED, feedback="Pushing..."),
+        T("pressing", "up", ">=", 150, sets=REACHED, feedback="Top Position - Hold!"),
+        T("pressing", "down", "<", 95, feedback="Keep pushing up!"),
+        T("up", "lowering", "<", 150, feedback="Lower Slowly"),
+        *_finish("lowering", "down", "<=", 95, "Rep {count} Done!", "Push higher next time"),
+    ],
+    holds={"up": 0.5},
+    hold_feedback="Hold: {held:.1f}/{hold}s",
+)
+
+# Hip - shoulder - elbow angle of both arms; 20 / 45 / 90 degrees, max 120
+LATERAL_RAISE = ExerciseSpec(
+    "Lateral Raise", angles=(L_SHOULDER_ANGLE, R_SHOULDER_ANGLE),
+    states=("down", "raising", "up", "lowering"),
+    faults=[
+        Fault("elbows_high", elbows_above_shoulders, "Elbows above shoulders - lower arms",
+              reason="bad_form", event="bad_form"),
+        Fault("too_high", lambda data, metric: metric > 120, "Too high! Lower arms",
+              reason="too_high", event="too_high"),
+    ],
+    transitions=[
+        T("down", "down", "<", 20, sets=STARTED, clears=FAILED | REACHED,
+          feedback="Ready to start"),
+        T("down", "raising", ">", 45, requires=STARTED, feedback="Raising arms..."),
+        T("down", "down", ">", 45, forbids=FAILED, sets=FAILED, reason="try_again",
+          event="try_again", feedback="Lower arms to start position first", status=WARNING),
+        T("down", "down", ">", 45, feedback="Lower arms to start position first", status=WARNING),
+        T("raising", "up", ">=", 90, sets=REACHED, feedback="Good! Hold at shoulder height"),
+        T("raising", "down", "<", 45, forbids=FAILED, sets=FAILED, reason="try_again",
+          event="try_again", feedback="Raise higher!", status=WARNING),
+        T("raising", "down", "<", 45),
+        T("up", "lowering", "<", 45, feedback="Lowering slowly..."),
+        *_finish("lowering", "down", "<", 20, "Perfect! Rep {count}", "Raise arms higher next time"),
+        T("lowering", "raising", ">", 45, feedback="Complete the lowering!", status=WARNING),
+    ],
+    holds={"up": 0.8},
+    hold_feedback="Hold: {held:.1f}/{hold}s",
+)
+
+# BicepCurl.py tracker: both elbows, 80 / 120 / 160 degrees, 0.4s at the top
+BICEPS_CURL = ExerciseSpec(
+    "Biceps Curl", angles=(L_ELBOW_ANGLE, R_ELBOW_ANGLE),
+    states=("down", "pressing", "up", "lowering"),
+    faults=[
+        Fault("wrist_drift", wrist_drift, "Keep wrists over elbows!", restart=False,
+              status=WARNING),
+    ],
+    transitions=[
+        T("down", "pressing", ">", 120, feedback="Pushing..."),
+        T("pressing", "up", ">=", 160),
+        T("pressing", "down", "<", 80),
+        T("up", "lowering", "<", 120),
+        T("lowering", "down", "<=", 80, count=True, feedback="Rep {count}! Good job!"),
+    ],
+    holds={"up": 0.4},
+    feedback="",
+)
+
+# Quick counters used by the Streamlit app (right arm only, no form checks)
+APP_EXERCISES = {
+    "Bicep Curl": ExerciseSpec(
+        "Quick Bicep Curl", angles=(R_ELBOW_ANGLE,), states=(None, "xuong", "len"),
+        transitions=[
+            T(ANY, "xuong", ">", 160),
+            T("xuong", "len", "<", 30, count=True),
+        ]),
+    "Overhead Press": ExerciseSpec(
+        "Quick Overhead Press", angles=(R_ELBOW_ANGLE,), states=(None, "xuong", "len"),
+        transitions=[
+            T(ANY, "xuong", "<", 60),
+            T("xuong", "len", ">", 160, count=True),
+        ]),
+    "Lateral Raise": ExerciseSpec(
+        "Quick Lateral Raise", angles=(R_SHOULDER_ANGLE,), states=(None, "xuong", "len"),
+        transitions=[
+            T(ANY, "xuong", "<", 30),
+            T("xuong", "len", ">", 80, count=True),
+        ]),
+}
+
+# The app draws its sidebar from the registry's names without importing this module
+if tuple(APP_EXERCISES) != exercise_registry.APP_EXERCISES:
+    raise ValueError(f"exercise_registry.APP_EXERCISES {exercise_registry.APP_EXERCISES} "
+                     f"doesn't match exercises.APP_EXERCISES {tuple(APP_EXERCISES)}")
+
+# Every spec by name (recordings store the name of the spec they were made with)
+SPECS = {spec.name: spec for spec in (OVERHEAD_PRESS, LATERAL_RAISE, BICEPS_CURL,
+                                      *APP_EXERCISES.values())}
@@ -0,0 +1,126 @@
+import sys
+import threading
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+
+class FrameBufferPool:
+    """Per-stream preallocated image buffers for the flip / convert path.
+
+    buffer(name, shape) is a single persistent buffer (e.g. the RGB copy fed
+    to MediaPipe); acquire()/release() hand out buffers that travel to
+    another thread, such as frames queued for the async worker. Buffers are
+    only allocated when a shape is seen for the first time, and every
+    allocation and byte written through the pool is counted so the per-frame
+    cost can be checked.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffers = {}
+        self._free = {}
+
+        self.frames = 0
+        self.allocations = 0
+        self.bytes_allocated = 0
+        self.bytes_copied = 0
+
+    def _allocate(self, shape, dtype):
+        buf = np.empty(shape, dtype=dtype)
+        self.allocations += 1
+        self.bytes_allocated += buf.nbytes
+        return buf
+
+    def buffer(self, name, shape, dtype=np.uint8):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._buffers[name] = self._allocate(shape, dtype)
+        return buf
+
+    def acquire(self, name, shape, dtype=np.uint8):
+        with self._lock:
+            free = self._free.setdefault(name, [])
+            while free:
+                buf = free.pop()
+                if buf.shape == shape and buf.dtype == dtype:
+                    return buf
+            return self._allocate(shape, dtype)
+
+    def release(self, name, buf):
+        with self._lock:
+            self._free.setdefault(name, []).append(buf)
+
+    def tick(self):
+        """Count one frame (for the per-frame stats)"""
+        self.frames += 1
+
+    def flip(self, frame, code=1):
+        """Mirror frame in place"""
+        self.bytes_copied += frame.nbytes
+        return cv2.flip(frame, code, dst=frame)
+
+    def to_rgb(self, frame, dst=None, name="rgb"):
+        """BGR -> RGB into dst (default: the pool's buffer called name)"""
+        if dst is None:
+            dst = self.buffer(name, frame.shape)
+        self.bytes_copied += frame.nbytes
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=dst)
+
+    def stats(self):
+        n = max(self.frames, 1)
+        return {
+            "frames": self.frames,
+            "allocations": self.allocations,
+            "allocations_per_frame": self.allocations / n,
+            "bytes_allocated_mb": self.bytes_allocated / 2**20,
+            "bytes_copied_per_frame_mb": self.bytes_copied / n / 2**20,
+        }
+
+
+def measure(fn, frames):
+    """Peak transient bytes allocated per call of fn(frame), via tracemalloc"""
+    tracemalloc.start()
+    try:
+        total = 0
+        for frame in frames:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn(frame)
+            total += tracemalloc.get_traced_memory()[1] - base
+        return total / len(frames)
+    finally:
+        tracemalloc.stop()
+
+
+# Benchmark: python frame_buffers.py [width height]
+if __name__ == "__main__":
+    width, height = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (1920, 1080)
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(5)] * 20
+
+    def old(frame):
+        image = cv2.flip(frame, 1)
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        rgb.flags.writeable = False
+        rgb.flags.writeable = True
+        return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+    pool = FrameBufferPool()
+
+    def new(frame):
+        pool.tick()
+        pool.flip(frame)
+        pool.to_rgb(frame)
+        return frame
+
+    for name, fn in (("old", old), ("pool", new)):
+        start = time.perf_counter()
+        for frame in frames:
+            fn(frame)
+        ms = 1000 * (time.perf_counter() - start) / len(frames)
+        mb = measure(fn, frames) / 2**20
+        print(f"{width}x{height} {name:>4}: {ms:.2f} ms/frame, {mb:.2f} MB allocated per frame")
+    print(pool.stats())
@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+from pose_angles import NUM_LANDMARKS
+
+
+class AdaptiveFrameSkipper:
+    """Decide per frame whether to run pose inference.
+
+    Inference cost is measured (EMA) against a per-frame time budget, 1/30 s
+    by default. When one inference takes longer than a frame, just enough
+    frames are skipped in between to keep up with the camera.
+    """
+
+    def __init__(self, budget=1 / 30, max_skip=3, smoothing=0.2):
+        self.budget = budget
+        self.max_skip = max_skip
+        self.smoothing = smoothing
+
+        self.cost = 0.0
+        self.consecutive_skips = 0
+
+        self.frames = 0
+        self.skipped = 0
+
+    def should_infer(self):
+        """Call once per incoming frame"""
+        self.frames += 1
+        target = min(self.max_skip, max(0, math.ceil(self.cost / self.budget) - 1))
+        if self.consecutive_skips >= target:
+            self.consecutive_skips = 0
+            return True
+        self.consecutive_skips += 1
+        self.skipped += 1
+        return False
+
+    def record(self, seconds):
+        """Report how long the last inference took"""
+        if self.cost == 0.0:
+            self.cost = seconds
+        else:
+            self.cost += self.smoothing * (seconds - self.cost)
+
+    def skip_rate(self):
+        return self.skipped / self.frames if self.frames else 0.0
+
+
+class LandmarkExtrapolator:
+    """Constant-velocity prediction of the landmark frame for skipped frames"""
+
+    def __init__(self, max_horizon=0.25):
+        self.max_horizon = max_horizon
+        self.prev = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self.curr = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self.velocity = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+        self._step = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+        self.t_curr = None
+        self.samples = 0
+
+    def clear(self):
+        self.t_curr = None
+        self.samples = 0
+        self.velocity.fill(0)
+
+    def push(self, data, t):
+        """Record an inferred (33, 4) landmark frame taken at time t"""
+        np.copyto(self.prev, self.curr)
+        np.copyto(self.curr, data)
+        if self.samples and t > self.t_curr:
+            np.subtract(self.curr[:, :3], self.prev[:, :3], out=self.velocity)
+            self.velocity /= (t - self.t_curr)
+        else:
+            self.velocity.fill(0)
+        self.t_curr = t
+        self.samples += 1
+
+    def predict(self, t, out):
+        """Write the landmarks expected at time t into out. False if no history."""
+        if not self.samples:
+            return False
+        dt = min(max(t - self.t_curr, 0.0), self.max_horizon)
+        np.copyto(out, self.curr)
+        np.multiply(self.velocity, dt, out=self._step)
+        out[:, :3] += self._step
+        return True
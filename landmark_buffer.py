@@ -0,0 +1,64 @@
+import numpy as np
+from pose_angles import (joint_angles, joint_angle_rates, NUM_LANDMARKS, ANGLE_NAMES,
+                         LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW,
+                         LEFT_WRIST, RIGHT_WRIST, LEFT_HIP, RIGHT_HIP)
+
+X, Y, Z, VISIBILITY = 0, 1, 2, 3
+
+
+class LandmarkBuffer:
+    """Reusable float32 (33, 4) landmark frame: x, y, z, visibility.
+
+    One buffer per tracker, filled in place from results.pose_landmarks each
+    frame. The named joints (left_wrist, right_shoulder, ...) are views into
+    the same memory, so reading them never allocates. velocity (33, 3) is
+    the landmark filter's speed estimate (zero without one) and angle_rates
+    the joint angles' rate of change in degrees/s.
+    """
+
+    def __init__(self):
+        self.data = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self.angles = np.zeros(len(ANGLE_NAMES), dtype=np.float32)
+        self.velocity = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+        self.angle_rates = np.zeros(len(ANGLE_NAMES), dtype=np.float32)
+        self.valid = False
+
+        d = self.data
+        self.xy = d[:, :2]
+        self.left_shoulder = d[LEFT_SHOULDER]
+        self.right_shoulder = d[RIGHT_SHOULDER]
+        self.left_elbow = d[LEFT_ELBOW]
+        self.right_elbow = d[RIGHT_ELBOW]
+        self.left_wrist = d[LEFT_WRIST]
+        self.right_wrist = d[RIGHT_WRIST]
+        self.left_hip = d[LEFT_HIP]
+        self.right_hip = d[RIGHT_HIP]
+
+    def update(self, pose_landmarks):
+        """Copy a MediaPipe NormalizedLandmarkList (or a (33, 4) array) into the buffer.
+
+        Returns self, or None (and marks the buffer invalid) if no pose.
+        """
+        if pose_landmarks is None:
+            self.valid = False
+            return None
+
+        d = self.data
+        if isinstance(pose_landmarks, np.ndarray):
+            np.copyto(d, pose_landmarks)
+        else:
+            for i, lm in enumerate(pose_landmarks.landmark):
+                d[i] = (lm.x, lm.y, lm.z, lm.visibility)
+        self.valid = True
+        self.compute_angles()
+        return self
+
+    def compute_angles(self):
+        """Refresh self.angles from the current buffer contents"""
+        joint_angles(self.data, out=self.angles)
+        return self.angles
+
+    def compute_rates(self):
+        """Refresh self.angle_rates from the current landmarks and velocity"""
+        joint_angle_rates(self.data, self.velocity, out=self.angle_rates)
+        return self.angle_rates
@@ -0,0 +1,146 @@
+import math
+import sys
+import time
+
+import numpy as np
+from pose_angles import NUM_LANDMARKS
+
+# Tuned on the replay suite with lite-graph jitter (python replay.py --copies 20
+# --noise 0.006 --filter): 35 of 240 cases fail unfiltered, 0 from min_cutoff
+# 1.5 with beta 8-16; a lower beta lags fast reps, a higher one lets jitter back in
+DEFAULT_MIN_CUTOFF = 1.5
+DEFAULT_BETA = 12.0
+DEFAULT_D_CUTOFF = 1.0
+
+
+class LandmarkFilter:
+    """One Euro filter over landmark coordinates, vectorized over every landmark.
+
+    Each coordinate is low-passed with a cutoff that rises with its own
+    speed: min_cutoff (Hz) while still, so the jitter that flips angles
+    back and forth across a threshold is smoothed away, and
+    min_cutoff + beta * |speed| while moving, so fast movement isn't
+    lagged. The speed estimate (itself low-passed at d_cutoff) is kept in
+    self.velocity, in coordinate units per second.
+
+    shape is (33, 3) for one stream, or (N, 33, 3) to filter N sessions at
+    once (each with its own clock, like RepEngine).
+    """
+
+    def __init__(self, shape=(NUM_LANDMARKS, 3), min_cutoff=DEFAULT_MIN_CUTOFF,
+                 beta=DEFAULT_BETA, d_cutoff=DEFAULT_D_CUTOFF):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        lead = tuple(shape[:-2])
+        self.value = np.zeros(shape, dtype=np.float32)
+        self.velocity = np.zeros(shape, dtype=np.float32)
+        self.t = np.zeros(lead, dtype=np.float64)
+        self.started = np.zeros(lead, dtype=bool)
+        self._delta = np.zeros(shape, dtype=np.float32)
+        self._alpha = np.zeros(shape, dtype=np.float32)
+
+    def reset(self, session=...):
+        """Forget the history (pose lost); the next sample passes through unfiltered"""
+        self.started[session] = False
+        self.velocity[session] = 0
+
+    def __call__(self, x, now, present=None):
+        """Filter x (shape, float) taken at now in place; returns x.
+
+        now is a time per session for batched filters. Sessions with
+        present False keep their state and x is left as it is.
+        """
+        if self.t.ndim == 0 and present is None:
+            return self._step(x, float(now))
+        now = np.asarray(now, dtype=np.float64)
+        dt = now - self.t
+        update = self.started & (dt > 0)
+        if present is not None:
+            update &= present
+        fresh = ~self.started if present is None else ~self.started & present
+
+        if update.any():
+            mask = update[..., None, None]
+            rate = np.where(update, 1.0 / np.where(update, dt, 1.0), 0.0)[..., None, None]
+            # Speed, low-passed at d_cutoff
+            np.subtract(x, self.value, out=self._delta)
+            self._delta *= rate
+            self._delta -= self.velocity
+            self._delta *= self._smoothing(self.d_cutoff, rate)
+            np.add(self.velocity, self._delta, out=self.velocity, where=mask)
+            # Position, low-passed at a cutoff that opens up with speed
+            np.abs(self.velocity, out=self._alpha)
+            self._alpha *= self.beta
+            self._alpha += self.min_cutoff
+            self._alpha *= 2 * math.pi
+            np.divide(self._alpha, self._alpha + rate, out=self._alpha)
+            np.subtract(x, self.value, out=self._delta)
+            self._delta *= self._alpha
+            np.add(self.value, self._delta, out=self.value, where=mask)
+            np.copyto(x, self.value, where=mask)
+
+        if fresh.any():
+            mask = fresh[..., None, None]
+            np.copyto(self.value, x, where=mask)
+            np.copyto(self.velocity, 0, where=mask)
+            self.started |= fresh
+        # A repeated timestamp gives the previous estimate again
+        repeat = self.started & ~update & ~fresh & (dt <= 0)
+        if present is not None:
+            repeat &= present
+        if repeat.any():
+            np.copyto(x, self.value, where=repeat[..., None, None])
+        np.copyto(self.t, now, where=update | fresh)
+        return x
+
+    def _step(self, x, now):
+        # One stream: same math as above without the per-session masks
+        dt = now - float(self.t)
+        if not self.started:
+            np.copyto(self.value, x)
+            self.velocity.fill(0)
+            self.started[...] = True
+        elif dt > 0:
+            rate = 1.0 / dt
+            np.subtract(x, self.value, out=self._delta)
+            self._delta *= rate
+            self._delta -= self.velocity
+            self._delta *= self._smoothing(self.d_cutoff, rate)
+            self.velocity += self._delta
+            np.abs(self.velocity, out=self._alpha)
+            self._alpha *= self.beta
+            self._alpha += self.min_cutoff
+            self._alpha *= 2 * math.pi
+            np.divide(self._alpha, self._alpha + rate, out=self._alpha)
+            np.subtract(x, self.value, out=self._delta)
+            self._delta *= self._alpha
+            self.value += self._delta
+        else:
+            np.copyto(x, self.value)
+            return x
+        np.copyto(x, self.value)
+        self.t[...] = now
+        return x
+
+    @staticmethod
+    def _smoothing(cutoff, rate):
+        """Exponential smoothing factor for a cutoff (Hz) at sample rate(s) rate"""
+        w = 2 * math.pi * cutoff
+        return w / (w + rate)
+
+
+# Cost per frame: python landmark_filter.py [frames]
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = np.random.default_rng(0)
+    # A still pose with detection jitter
+    raw = 0.5 + rng.normal(0.0, 0.005, (n, NUM_LANDMARKS, 3)).astype(np.float32)
+    frames = raw.copy()
+    f = LandmarkFilter()
+    start = time.perf_counter()
+    for k in range(n):
+        f(frames[k], k / 30)
+    elapsed = time.perf_counter() - start
+    print(f"{1e6 * elapsed / n:.1f} us per frame; frame-to-frame jitter "
+          f"{float(np.std(np.diff(raw, axis=0))):.4f} -> {float(np.std(np.diff(frames, axis=0))):.4f}")
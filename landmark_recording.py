@@ -0,0 +1,145 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from pose_angles import NUM_LANDMARKS
+
+MAGIC = b"LMREC001"
+# Header (magic + JSON metadata, space padded) ends on a page boundary so
+# the records can be memory-mapped straight from the file
+HEADER_SIZE = 4096
+
+# One record = float32[RECORD_FLOATS]: the (33, 4) landmarks, then these fields
+FIELDS = ("t", "angle", "state", "count", "present")
+LANDMARK_FLOATS = NUM_LANDMARKS * 4
+RECORD_FLOATS = LANDMARK_FLOATS + len(FIELDS)
+RECORD_BYTES = RECORD_FLOATS * 4
+T_COL, ANGLE_COL, STATE_COL, COUNT_COL, PRESENT_COL = range(LANDMARK_FLOATS, RECORD_FLOATS)
+
+
+class LandmarkRecorder:
+    """Append-only writer of one float32 record per frame.
+
+    t is stored in seconds since the first record (the wall-clock start is in
+    the header), so float32 keeps sub-millisecond resolution for hours.
+    Frames without a pose are written with present = 0 so the timeline has
+    no gaps. Safe to close from another thread while frames are written.
+    """
+
+    def __init__(self, path, exercise=None, states=(), **meta):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._file = open(path, "wb")
+        self._lock = threading.Lock()
+        self._record = np.zeros(RECORD_FLOATS, dtype=np.float32)
+        self._landmarks = self._record[:LANDMARK_FLOATS].reshape(NUM_LANDMARKS, 4)
+        self._t0 = None
+        self.frames = 0
+
+        self.meta = dict(meta, exercise=exercise, states=list(states), fields=list(FIELDS),
+                         started=time.time())
+        header = MAGIC + json.dumps(self.meta).encode()
+        if len(header) > HEADER_SIZE:
+            raise ValueError("Recording metadata too large for the header")
+        self._file.write(header.ljust(HEADER_SIZE, b" "))
+
+    @classmethod
+    def for_reps(cls, path, reps, **meta):
+        """Recorder labelled with a RepEngine's exercise and state names"""
+        return cls(path, reps.spec.name, reps.table.states, **meta)
+
+    def write(self, t, landmarks=None, angle=np.nan, state=-1, count=0):
+        """Append one frame; landmarks None records a frame with no pose"""
+        with self._lock:
+            if self._file is None:
+                return
+            if self._t0 is None:
+                self._t0 = t
+            r = self._record
+            if landmarks is None:
+                self._landmarks[:] = 0.0
+                r[PRESENT_COL] = 0.0
+            else:
+                self._landmarks[:] = landmarks
+                r[PRESENT_COL] = 1.0
+            r[T_COL] = t - self._t0
+            r[ANGLE_COL] = angle
+            r[STATE_COL] = state
+            r[COUNT_COL] = count
+            self._file.write(r.data)
+            self.frames += 1
+
+    def write_reps(self, t, landmarks, reps, i=0):
+        """Append a frame with session i's metric, state and count from a RepEngine"""
+        self.write(t, landmarks, reps.metric[i], reps.state[i], reps.count[i])
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LandmarkRecording:
+    """Read-only memory-mapped view of a recording.
+
+    landmarks is a (T, 33, 4) float32 view straight onto the file (no copy);
+    t, angle, state, count and present are (T,) views. A partly written last
+    record (recorder still running or killed) is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if not header.startswith(MAGIC):
+            raise ValueError(f"{path} is not a landmark recording")
+        self.meta = json.loads(header[len(MAGIC):].decode().rstrip())
+        self.states = self.meta.get("states", [])
+
+        frames = max(0, os.path.getsize(path) - HEADER_SIZE) // RECORD_BYTES
+        if frames:
+            self.records = np.memmap(path, dtype=np.float32, mode="r", offset=HEADER_SIZE,
+                                     shape=(frames, RECORD_FLOATS))
+        else:
+            self.records = np.zeros((0, RECORD_FLOATS), dtype=np.float32)
+
+        r = self.records
+        self.landmarks = r[:, :LANDMARK_FLOATS].reshape(frames, NUM_LANDMARKS, 4)
+        self.t = r[:, T_COL]
+        self.angle = r[:, ANGLE_COL]
+        self.state = r[:, STATE_COL]
+        self.count = r[:, COUNT_COL]
+        self.present = r[:, PRESENT_COL]
+
+    def __len__(self):
+        return len(self.records)
+
+    def state_name(self, i):
+        s = int(self.state[i])
+        return self.states[s] if 0 <= s < len(self.states) else None
+
+    def duration(self):
+        return float(self.t[-1]) if len(self) else 0.0
+
+
+# Summary: python landmark_recording.py recording.lmr [...]
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        rec = LandmarkRecording(path)
+        size = os.path.getsize(path)
+        print(f"{path}: {rec.meta.get('exercise')}, {len(rec)} frames, {rec.duration():.1f}s, "
+              f"{int(rec.count[-1]) if len(rec) else 0} reps, "
+              f"{100 * float(rec.present.mean()) if len(rec) else 0:.0f}% with pose, "
+              f"{size / 2**20:.2f} MB")
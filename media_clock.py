@@ -0,0 +1,60 @@
+import time
+
+import cv2
+
+# Media time may jump ahead this far (s) between two frames before the
+# stream counts as restarted
+DEFAULT_MAX_GAP = 2.0
+
+
+def frame_seconds(frame):
+    """Presentation time of an av.VideoFrame (pts * time_base) in seconds, None if unset"""
+    if frame.pts is None or frame.time_base is None:
+        return None
+    return float(frame.pts * frame.time_base)
+
+
+def capture_seconds(cap):
+    """Position of the frame just read from a cv2.VideoCapture in seconds, None if unknown"""
+    ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+    return ms / 1000.0 if ms > 0 else None
+
+
+class MediaClock:
+    """Turns per-frame media timestamps into the time the rep logic runs on.
+
+    Holds, rep durations and cue cooldowns are measured between frames'
+    own timestamps, so the trackers judge a rep the same whether frames
+    arrive live, late, in bursts or offline far faster than real time.
+    Media time is followed as long as it moves forward by at most max_gap.
+    Otherwise (no timestamp, WebRTC restarting pts after a reconnect, a
+    backwards seek) the clock carries on by the wall-clock time since the
+    previous frame and re-anchors the media timeline there, so the result
+    never goes backwards. A repeated timestamp gives the same time again.
+    """
+
+    def __init__(self, max_gap=DEFAULT_MAX_GAP):
+        self.max_gap = max_gap
+        self.now = None
+        self.offset = 0.0
+        self.rebases = 0
+        self._media = None
+        self._wall = None
+
+    def __call__(self, media=None):
+        """Time for a frame with media timestamp media (seconds, or None)"""
+        wall = time.perf_counter()
+        last = self._media
+        if self.now is None:
+            self.now = wall if media is None else media
+        elif media is not None and last is not None and 0 < media - last <= self.max_gap:
+            self.now = media + self.offset
+        elif media is None or media != last:
+            self.now += max(wall - self._wall, 0.0)
+            if media is not None:
+                self.offset = self.now - media
+                if last is not None:
+                    self.rebases += 1
+        self._media = media
+        self._wall = wall
+        return self.now
@@ -0,0 +1,233 @@
+import sys
+import time
+import types
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Skip pose inference on frames where nothing moved.
+
+    Each frame is shrunk to a small grayscale thumbnail (linear to twice the
+    size, then INTER_AREA: sensor noise averages out at a tenth of the cost
+    of INTER_AREA on the full frame) and compared with the thumbnail of the
+    last frame that went to inference. When fewer than min_changed of its pixels
+    differ by more than pixel_threshold grey levels the scene is static and
+    the previous landmarks still hold, so the pipeline reuses them instead
+    of running the model: between sets, during holds, or with nobody in
+    view. Comparing against the last inferred frame rather than the
+    previous one means slow movement still adds up to a change.
+
+    A thumbnail identical to the previous frame's is counted as a duplicate
+    (WebRTC re-delivering the same frame). Inference is forced at least
+    every max_static seconds so tracking keeps up with slow drift.
+    """
+
+    def __init__(self, size=(64, 48), pixel_threshold=10, min_changed=0.002, max_static=1.0,
+                 smoothing=0.2):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.max_static = max_static
+        self.smoothing = smoothing
+
+        shape = (size[1], size[0])
+        self._mid_size = (2 * size[0], 2 * size[1])
+        self._mid = np.zeros((2 * size[1], 2 * size[0], 3), dtype=np.uint8)
+        self._small = np.zeros(shape + (3,), dtype=np.uint8)
+        self._thumb = np.zeros(shape, dtype=np.uint8)
+        self._prev = np.zeros(shape, dtype=np.uint8)
+        self._ref = np.zeros(shape, dtype=np.uint8)
+        self._diff = np.zeros(shape, dtype=np.uint8)
+        self._has_prev = False
+        self._ref_time = None
+
+        # Stats
+        self.frames = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.inferred = 0
+        self.cost = 0.0
+        self.gate_time = 0.0
+
+    def reset(self):
+        """Forget the reference frame: the next frame goes to inference"""
+        self._has_prev = False
+        self._ref_time = None
+
+    def is_static(self, frame, now):
+        """True if frame (3-channel, taken at now) can reuse the last inference"""
+        start = time.perf_counter()
+        self.frames += 1
+        cv2.resize(frame, self._mid_size, dst=self._mid, interpolation=cv2.INTER_LINEAR)
+        cv2.resize(self._mid, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        # Channel order doesn't matter for motion: BGR and RGB frames both work
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._thumb)
+        duplicate = self._has_prev and np.array_equal(self._thumb, self._prev)
+        # _prev now holds this frame's thumbnail
+        self._prev, self._thumb = self._thumb, self._prev
+        self._has_prev = True
+
+        static = False
+        if self._ref_time is not None:
+            if duplicate:
+                static = True
+            elif now - self._ref_time < self.max_static:
+                cv2.absdiff(self._prev, self._ref, dst=self._diff)
+                changed = np.count_nonzero(self._diff > self.pixel_threshold)
+                static = changed < self.min_changed * self._diff.size
+        if static:
+            self.skipped += 1
+            self.duplicates += duplicate
+        self.gate_time += time.perf_counter() - start
+        return static
+
+    def accept(self, now, cost):
+        """The frame just checked went to inference (taking cost seconds): new reference"""
+        np.copyto(self._ref, self._prev)
+        self._ref_time = now
+        self.inferred += 1
+        self.cost = cost if self.cost == 0.0 else self.cost + self.smoothing * (cost - self.cost)
+
+    def skip_rate(self):
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def stats(self):
+        """Skip rate and inference time saved (net of the gate's own cost)"""
+        saved = self.skipped * self.cost - self.gate_time
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "duplicates": self.duplicates,
+            "skip_rate": self.skip_rate(),
+            "gate_ms": 1000 * self.gate_time / self.frames if self.frames else 0.0,
+            "cpu_saved_s": saved,
+            "cpu_saved_pct": 100 * saved / (self.frames * self.cost) if self.frames and self.cost else 0.0,
+        }
+
+
+# --- Benchmark: rendered replay cases, counted with and without the gate ---
+
+class _ScriptedEngine:
+    """Pose engine stand-in returning the case's landmarks for the current frame"""
+
+    def __init__(self):
+        self.landmarks = None
+        self.calls = 0
+
+    def open_stream(self):
+        return 0
+
+    def release(self, stream_id):
+        pass
+
+    def process(self, stream_id, image_rgb):
+        self.calls += 1
+        return types.SimpleNamespace(pose_landmarks=self.landmarks)
+
+
+# Skeleton drawn for the benchmark frames: torso, arms, shoulders
+_BONES = ((11, 12), (11, 23), (12, 24), (23, 24), (11, 13), (13, 15), (12, 14), (14, 16))
+
+
+def render_frames(case, size=(640, 480), idle=3.0, away=2.0, duplicate_every=15, noise=2.0,
+                  seed=0):
+    """Yield (frame, t, landmarks or None) for a replay case as camera frames.
+
+    The person stands still for idle seconds before and after the set and
+    then leaves for away seconds; sensor noise is added and every
+    duplicate_every-th frame is delivered twice, as WebRTC sometimes does.
+    """
+    w, h = size
+    rng = np.random.default_rng(seed)
+    fps = 1.0 / float(np.median(np.diff(case.t)))
+    n_idle, n_away = int(idle * fps), int(away * fps)
+    index = [0] * n_idle + list(range(len(case))) + [len(case) - 1] * n_idle + [-1] * n_away
+    background = np.empty((h, w, 3), dtype=np.uint8)
+    background[:] = np.linspace(60, 180, w, dtype=np.uint8)[None, :, None]
+    grain = rng.normal(0.0, noise, (8, h, w, 3)).astype(np.int16)
+    frame = np.empty_like(background)
+    for k, i in enumerate(index):
+        lm = case.landmarks[i] if i >= 0 and case.present[i] else None
+        np.copyto(frame, background)
+        if lm is not None:
+            pts = (lm[:, :2] * (w, h)).astype(np.int32)
+            cv2.circle(frame, tuple(pts[0]), 30, (200, 170, 150), -1)
+            for a, b in _BONES:
+                cv2.line(frame, tuple(pts[a]), tuple(pts[b]), (40, 90, 200), 14)
+        np.clip(frame + grain[k % len(grain)], 0, 255, out=frame, casting="unsafe")
+        t = k / fps
+        yield frame, t, lm
+        if duplicate_every and k % duplicate_every == duplicate_every - 1:
+            yield frame, t, lm
+
+
+def run_case(case, gate):
+    """(count, failures, inferences) for case through a PosePipeline with gate"""
+    from frame_skip import AdaptiveFrameSkipper
+    from pose_pipeline import PosePipeline
+    from rep_engine import RepEngine, FAILED
+
+    engine = _ScriptedEngine()
+    pipeline = PosePipeline(engine, skipper=AdaptiveFrameSkipper(max_skip=0), roi=False,
+                            tuner=False, gate=gate)
+    reps = RepEngine(case.spec)
+    failures = 0
+    for frame, t, lm in render_frames(case):
+        engine.landmarks = lm
+        out = pipeline.detect(frame, t)
+        if out is not None:
+            before = reps.flags[0] & FAILED
+            reps.step(out.data[None], out.angles[None], t)
+            failures += bool(reps.flags[0] & FAILED and not before)
+    return int(reps.count[0]), failures, engine.calls
+
+
+def _pose_cost():
+    """Median seconds of one real inference on a 640x480 frame (None without MediaPipe)"""
+    try:
+        from pose_engine import get_engine
+        engine = get_engine()
+    except Exception:
+        return None
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    stream = engine.open_stream()
+    samples = []
+    for _ in range(10):
+        start = time.perf_counter()
+        engine.process(stream, frame)
+        samples.append(time.perf_counter() - start)
+    engine.release(stream)
+    return float(np.median(samples[2:]))
+
+
+# Skip rate / missed reps: python motion_gate.py [copies]
+if __name__ == "__main__":
+    from replay import synthetic_suite
+
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    cost = _pose_cost()
+    frames = skipped = duplicates = gate_time = missed = 0
+    for case in synthetic_suite(copies):
+        count, failures, calls = run_case(case, False)
+        gate = MotionGate()
+        gated_count, gated_failures, gated_calls = run_case(case, gate)
+        stats = gate.stats()
+        frames += stats["frames"]
+        skipped += stats["skipped"]
+        duplicates += stats["duplicates"]
+        gate_time += gate.gate_time
+        missed += abs(count - gated_count) + abs(failures - gated_failures)
+        ok = "ok  " if (count, failures) == (gated_count, gated_failures) else "DIFF"
+        print(f"{ok} {case.name:30s} reps {count} -> {gated_count}, failed {failures} -> "
+              f"{gated_failures}, inferences {calls} -> {gated_calls} "
+              f"(skip {100 * stats['skip_rate']:.0f}%, {stats['duplicates']} duplicates)")
+
+    per_frame = gate_time / max(frames, 1)
+    print(f"{frames} frames: {skipped} skipped ({100 * skipped / max(frames, 1):.1f}%, "
+          f"{duplicates} duplicates), gate {1000 * per_frame:.3f} ms/frame, "
+          f"{missed} rep / failure differences")
+    if cost:
+        saved = (skipped * cost - gate_time) / (frames * cost)
+        print(f"pose inference {1000 * cost:.1f} ms/frame: {100 * saved:.1f}% of inference CPU saved")
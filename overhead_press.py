@@ -1,12 +1,21 @@
 import cv2
-import numpy as np
-import mediapipe as mp
+import sys
 import time
-import pygame
 import gc 
+from rep_engine import RepEngine, STATUS_COLORS, STATUS_NAMES
+from exercises import OVERHEAD_PRESS
+from rep_telemetry import RepTelemetry, stream_name
+from database import get_rep_log
+from landmark_recording import LandmarkRecorder
+from pose_pipeline import PosePipeline
+from pose_renderer import PoseRenderer
+from pose_engine import get_engine
+from audio_service import get_audio
+from stage_timing import stage_timer
+from media_clock import MediaClock, capture_seconds
 
 class OverheadPressTracker:
-    def __init__(self):
+    def __init__(self, engine=None, sink=None):
         # Audio paths
         self.success_sound_path = "audio/perfect.wav"
         self.background_sound_path = "audio/background_music.mp3"
@@ -14,331 +23,171 @@ class OverheadPressTracker:
         self.bad_form_sound_path = "audio/bad_form.mp3"
         self.try_again_sound_path = "audio/try_again.wav"
         
-        # Audio initialization flags
-        self.pygame_initialized = False
+        # Cues are decoded once per process and played by the shared audio
+        # thread (cooldown applied there); the frame thread only enqueues
+        self.audio = get_audio()
         self.sounds_loaded = False
-        self.sound_enabled = False
-        self.music_loaded = False
-        self.music_playing = False
         
-        # Sound cooldown tracking
-        self.last_sound_time = {}  
-        self.sound_cooldown = 1.5
+        # Skeleton + HUD drawing (text re-rendered only when it changes)
+        self.renderer = PoseRenderer()
         
-        self.mp_pose = mp.solutions.pose
-        self.mp_drawing = mp.solutions.drawing_utils
+        # Detection stage: pose graphs come from the shared engine (tier picked
+        # at runtime), adaptive frame skipping + landmark extrapolation.
+        # Its landmark buffer is reused across frames.
+        self.pipeline = PosePipeline(engine or get_engine())
+        self.landmarks = self.pipeline.landmarks
         
-        self.drawing_spec_good = mp.solutions.drawing_utils.DrawingSpec(
-            color=(0, 255, 0), thickness=2, circle_radius=2
-        )
-        self.drawing_spec_warning = mp.solutions.drawing_utils.DrawingSpec(
-            color=(0, 165, 255), thickness=2, circle_radius=2
-        )
-        self.drawing_spec_error = mp.solutions.drawing_utils.DrawingSpec(
-            color=(0, 0, 255), thickness=2, circle_radius=2
-        )
+        # Rep state machine (thresholds, hold time, form check in exercises.py)
+        self.reps = RepEngine(OVERHEAD_PRESS)
+        # Frame timestamps -> monotonic time for the rep logic
+        self.clock = MediaClock()
+        self.recorder = None
         
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
-            smooth_landmarks=True,
-            enable_segmentation=False,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
+        # Per-rep detail (duration, angle range, hold, failure) -> sink, by default
+        # the reps table written by a background thread (opened only then)
+        self.telemetry = RepTelemetry(self.reps, sink or get_rep_log().put, stream_name("overhead_press"))
         
-        self.reset()
+        # Per-stage latency histograms (None when POSE_TIMING=0)
+        self.timing = stage_timer("overhead_press")
+        self.pipeline.timing = self.timing
         
-        # Thresholds 
-        self.FULL_DOWN = 95      
-        self.MID_POINT = 115   
-        self.FULL_UP = 150    
-        self.WRIST_DRIFT = 0.25  
+        self.reset()
+    
+    @property
+    def count(self):
+        return int(self.reps.count[0])
+    
+    @property
+    def state(self):
+        return self.reps.state_name()
+    
+    def start_recording(self, path):
+        """Record every frame's landmarks, angle, state and count to path"""
+        self.stop_recording()
+        self.recorder = LandmarkRecorder.for_reps(path, self.reps)
+    
+    def stop_recording(self):
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
     
     def reset(self):
-        self.count = 0
-        self.state = "down"
-        self.up_time = None
-        self.min_rep_time = 0.5  
-        self.rep_started = False
-        self.rep_failed = False
-        self.failure_reason = None
-        self.reached_up_state = False
+        self.reps.reset()
+        self.telemetry.reset()
         self.feedback = "Ready"
         self.form_status = "good"
-        self.last_sound_time = {}        
         # Performance optimization
-        self.frame_skip_count = 0
-        self.frame_skip_interval = 2
         self.gc_counter = 0
         self.gc_interval = 100
-        self.last_processed_frame = None
+        self.pipeline.reset()
     def cleanup(self):
         """Cleanup resources when tracker is being destroyed"""
         try:
             if self.music_playing:
                 self.stop_background_music()
             
-            if self.pygame_initialized:
-                pygame.mixer.quit()
-                self.pygame_initialized = False
-            
-            if hasattr(self, 'pose'):
-                self.pose.close()
+            if hasattr(self, 'pipeline'):
+                self.pipeline.close()
+            self.stop_recording()
         except Exception as e:
             print(f"Error during cleanup: {e}")
 
     
     def initialize_audio(self):
-        if not self.pygame_initialized:
-            try:
-                pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
-                pygame.mixer.set_num_channels(8)
-                self.pygame_initialized = True
-            except:
-                print("Warning: Could not initialize pygame mixer")
-                return False
-        
-        if not self.sounds_loaded and self.pygame_initialized:
-            try:
-                self.sound_success = pygame.mixer.Sound(self.success_sound_path)
-                self.sound_too_high = pygame.mixer.Sound(self.too_high_sound_path)
-                self.sound_bad_form = pygame.mixer.Sound(self.bad_form_sound_path)
-                self.sound_try_again = pygame.mixer.Sound(self.try_again_sound_path)
-                self.sounds_loaded = True
-                self.sound_enabled = True
-            except Exception as e:
-                print(f"Could not load sound files: {e}")
-                return False
-        
-        return True
+        if not self.sounds_loaded:
+            self.sounds_loaded = self.audio.load({
+                "success": self.success_sound_path,
+                "too_high": self.too_high_sound_path,
+                "bad_form": self.bad_form_sound_path,
+                "try_again": self.try_again_sound_path,
+            })
+        return self.sounds_loaded
+    
+    @property
+    def music_playing(self):
+        return self.audio.music_playing
     
     def start_background_music(self):
         if not self.initialize_audio():
             return
-        
-        if not self.music_loaded:
-            try:
-                pygame.mixer.music.load(self.background_sound_path)
-                pygame.mixer.music.set_volume(0.3)
-                self.music_loaded = True
-            except Exception as e:
-                print(f"Could not load background music: {e}")
-                return
-        
         if not self.music_playing:
-            try:
-                pygame.mixer.music.play(-1)
-                self.music_playing = True
-            except Exception as e:
-                print(f"Could not play background music: {e}")
+            self.audio.start_music(self.background_sound_path, volume=0.3)
     
     def stop_background_music(self):
         if self.music_playing:
-            pygame.mixer.music.stop()
-            self.music_playing = False
-    
-    def play_event_sound(self, sound, sound_type):
-        if not self.sound_enabled or not self.sounds_loaded:
-            return
-        
-        now = time.time()
-        if sound_type not in self.last_sound_time or \
-           now - self.last_sound_time[sound_type] > self.sound_cooldown:
-            try:
-                sound.play()
-                self.last_sound_time[sound_type] = now
-            except Exception as e:
-                print(f"Could not play sound: {e}")
+            self.audio.stop_music()
     
-    def calculate_angle(self, a, b, c):
-#Angle between 3 points
-        a = np.array(a)
-        b = np.array(b)
-        c = np.array(c)
-        
-        radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-        angle = np.abs(radians * 180.0 / np.pi)
-        
-        if angle > 180.0:
-            angle = 360 - angle
-            
-        return angle
-    
-    def check_form(self, landmarks, current_angle=None, current_state=None):
-        try:
-            # Get landmarks for wrists and shoulders
-            left_wrist = landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST]
-            right_wrist = landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST]
-            left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER]
-            right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER]
-            
-            # Calculate distance between wrists and shoulders
-            wrist_distance = abs(left_wrist.x - right_wrist.x)
-            shoulder_distance = abs(left_shoulder.x - right_shoulder.x)
-            
-            # Condition: Arms shouldn't be too close (narrower than 70% of shoulder width)
-            if wrist_distance < shoulder_distance * 0.7:
-                return False, "Too narrow - widen grip"
-            
-            return True, "Good form"
-        except:
-            return True, ""
-
-    def process_frame(self, frame):
+    def process_frame(self, frame, timestamp=None):
         # Performance optimizations
         self.gc_counter += 1
         if self.gc_counter >= self.gc_interval:
             gc.collect()
             self.gc_counter = 0
         
-        self.frame_skip_count += 1
-        if self.frame_skip_count % self.frame_skip_interval != 0:
-            if self.last_processed_frame:
-                return self.last_processed_frame
+        # Skipped frames get extrapolated landmarks drawn on the live frame.
+        # The overlay is drawn straight onto the caller's BGR frame (no copy).
+        timing = self.timing
+        # All timing (holds, rep duration, cue cooldown) follows the frame's
+        # media timestamp (seconds); wall clock for frames without one
+        now = self.clock(timestamp)
+        lm = self.pipeline.detect(frame, now)
+        if timing:
+            t = time.perf_counter()
+        image = frame
+        reps = self.reps
+        form_warning = ""
         
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image.flags.writeable = False
-        results = self.pose.process(image)
-        image.flags.writeable = True
-        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        if lm is not None:
+            # Form check + rep counting from the OVERHEAD_PRESS transition table
+            reps.step(lm.data[None], lm.angles[None], now, rates=lm.angle_rates[None])
+            self.telemetry.observe(now)
+            if self.sounds_loaded:
+                for event in reps.event_names():
+                    self.audio.play(event, now, source=id(self))
+            form_warning = reps.warning()
+            feedback = reps.feedback(0, now)
+            
+            # Drawing color follows the form status
+            status = reps.status_of()
+            self.form_status = STATUS_NAMES[status]
+            angle_color = STATUS_COLORS[status]
         
-        form_warning = ""
-        angle = 0
-        feedback = self.feedback
+        else:
+            feedback = "No pose detected - Stand in view"
         
-        if results.pose_landmarks:
-            landmarks = results.pose_landmarks.landmark
-            
-            # Get coordinates
-            l_shoulder = [landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER].x, 
-                         landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER].y]
-            l_elbow = [landmarks[self.mp_pose.PoseLandmark.LEFT_ELBOW].x, 
-                      landmarks[self.mp_pose.PoseLandmark.LEFT_ELBOW].y]
-            l_wrist = [landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST].x, 
-                      landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST].y]
-            
-            r_shoulder = [landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER].x, 
-                         landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER].y]
-            r_elbow = [landmarks[self.mp_pose.PoseLandmark.RIGHT_ELBOW].x, 
-                      landmarks[self.mp_pose.PoseLandmark.RIGHT_ELBOW].y]
-            r_wrist = [landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST].x, 
-                      landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST].y]
-            
-            # Calculate angles
-            angle_l = self.calculate_angle(l_shoulder, l_elbow, l_wrist)
-            angle_r = self.calculate_angle(r_shoulder, r_elbow, r_wrist)
-            angle = (angle_l + angle_r) / 2
-            
-            current_time = time.time()
-            form_ok, form_feedback = self.check_form(landmarks)
-            
-            if not form_ok:
-                form_warning = form_feedback
-                self.form_status = "error"
-                if self.rep_started and not self.rep_failed:
-                    self.rep_failed = True
-                    self.failure_reason = "bad_form"
-                    if self.sounds_loaded:
-                        self.play_event_sound(self.sound_bad_form, "bad_form")
-                self.state = "down"
-                self.up_time = None
-                feedback = "Fix form: " + form_feedback
-            else:
-                self.form_status = "good"
-                
-                # Rep counting logic 
-                if self.state == "down":
-                    if angle > self.FULL_DOWN:  
-                        self.state = "pressing"
-                        feedback = "Pushing..."
-                        self.rep_started = True
-                
-                elif self.state == "pressing":
-                    if angle >= self.FULL_UP:
-                        self.state = "up"
-                        self.up_time = current_time
-                        self.reached_up_state = True
-                        feedback = "Top Position - Hold!"
-                    elif angle < self.FULL_DOWN:
-                        self.state = "down"
-                        feedback = "Keep pushing up!"
-                
-                elif self.state == "up":
-                    if self.up_time and (current_time - self.up_time) >= self.min_rep_time:
-                        if angle < self.FULL_UP:  
-                            self.state = "lowering"
-                            feedback = "Lower Slowly"
-                    else:
-                        hold_time = current_time - self.up_time
-                        feedback = f"Hold: {hold_time:.1f}/{self.min_rep_time}s"
-                
-                elif self.state == "lowering":
-                    if angle <= self.FULL_DOWN:
-                        if self.rep_started and not self.rep_failed and self.reached_up_state:
-                            self.count += 1
-                            feedback = f"Rep {self.count} Done!"
-                            if self.sounds_loaded:
-                                self.play_event_sound(self.sound_success, "success")
-                        elif not self.reached_up_state:
-                            feedback = "Push higher next time"
-                        elif self.rep_failed and self.failure_reason:
-                            feedback = f"Failed: {self.failure_reason.replace('_', ' ')}"
-                        
-                        self.state = "down"
-                        self.rep_started = False
-                        self.rep_failed = False
-                        self.failure_reason = None
-                        self.reached_up_state = False
-            
-            # Determine drawing color based on form status
-            if self.form_status == "good":
-                drawing_spec = self.drawing_spec_good
-                angle_color = (0, 255, 0)
-            elif self.form_status == "warning":
-                drawing_spec = self.drawing_spec_warning
-                angle_color = (0, 165, 255)
-            else:  
-                drawing_spec = self.drawing_spec_error
-                angle_color = (0, 0, 255)
-            
+        if self.recorder:
+            self.recorder.write_reps(now, lm.data if lm is not None else None, reps)
+        if timing:
+            t = timing.lap("reps", t)
+        
+        if lm is not None:
             # Draw landmarks with color
-            self.mp_drawing.draw_landmarks(
-                image, results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS,
-                drawing_spec, drawing_spec
-            )
+            self.renderer.draw_pose(image, lm.data, angle_color)
             
             # Draw angle text
-            cv2.putText(image, f'Angle: {int(angle)}°', (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, angle_color, 2)
-        
-        else:
-            feedback = "No pose detected - Stand in view"
+            self.renderer.text(image, f'Angle: {int(reps.metric[0])}°', (10, 30), 0.7, angle_color, 2)
         
         # Draw stats
-        cv2.putText(image, f'Count: {self.count}', (10, 60),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
+        self.renderer.text(image, f'Count: {self.count}', (10, 60), 0.7, (0, 0, 0), 2)
         
-        cv2.putText(image, f'State: {self.state}', (10, 90),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 140, 0), 2)
+        self.renderer.text(image, f'State: {self.state}', (10, 90), 0.6, (255, 140, 0), 2)
         
-        cv2.putText(image, feedback, (10, 120),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        self.renderer.text(image, feedback, (10, 120), 0.6, (255, 255, 255), 2)
         
         if form_warning:
-            cv2.putText(image, form_warning, (10, 150),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+            self.renderer.text(image, form_warning, (10, 150), 0.6, (0, 0, 255), 2)
+        if timing:
+            timing.lap("draw", t)
         
-        # Cache for frame skipping
-        self.last_processed_frame = (image, self.count, feedback)
-        return image, self.count, feedback
+        self.feedback = feedback
+        return image, self.count, feedback, self.state
 
 
-# For standalone use
+# For standalone use: python overhead_press.py [video] (webcam by default)
 if __name__ == "__main__":
     tracker = OverheadPressTracker()
     
-    cap = cv2.VideoCapture(0)
+    cap = cv2.VideoCapture(sys.argv[1] if len(sys.argv) > 1 else 0)
 
     print("Press 'q' to quit")
     print("Press 'r' to reset counter")
@@ -349,7 +198,7 @@ if __name__ == "__main__":
         if not ret: 
             break
             
-        processed_frame, count, feedback = tracker.process_frame(frame)
+        processed_frame, count, feedback, state = tracker.process_frame(frame, capture_seconds(cap))
         cv2.imshow('Overhead Press Tracker', processed_frame)
         
         key = cv2.waitKey(1) & 0xFF
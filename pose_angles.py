@@ -0,0 +1,76 @@
+import numpy as np
+
+# MediaPipe Pose landmark indices (mp.solutions.pose.PoseLandmark)
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_HIP = 23
+RIGHT_HIP = 24
+
+NUM_LANDMARKS = 33
+
+# Column order of the angle vector returned by joint_angles()
+ANGLE_NAMES = ("left_elbow", "right_elbow", "left_shoulder", "right_shoulder")
+L_ELBOW_ANGLE = 0
+R_ELBOW_ANGLE = 1
+L_SHOULDER_ANGLE = 2
+R_SHOULDER_ANGLE = 3
+
+# (a, b, c) triplets, angle measured at b.
+# Elbow = shoulder-elbow-wrist, shoulder = hip-shoulder-elbow.
+_A = np.array([LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP])
+_B = np.array([LEFT_ELBOW, RIGHT_ELBOW, LEFT_SHOULDER, RIGHT_SHOULDER])
+_C = np.array([LEFT_WRIST, RIGHT_WRIST, LEFT_ELBOW, RIGHT_ELBOW])
+
+
+def joint_angles(landmarks, out=None):
+    """Return every tracked joint angle (degrees) in one batched call.
+
+    landmarks is (33, k) for one frame or (T, 33, k) for a whole session,
+    with k >= 2 (x, y[, z, visibility]). Result is (4,) or (T, 4) in
+    ANGLE_NAMES order; pass out= to reuse a buffer across frames.
+    """
+    lm = np.asarray(landmarks)
+    x = lm[..., 0]
+    y = lm[..., 1]
+    bx = x[..., _B]
+    by = y[..., _B]
+
+    radians = np.arctan2(y[..., _C] - by, x[..., _C] - bx)
+    radians -= np.arctan2(y[..., _A] - by, x[..., _A] - bx)
+    angles = np.abs(np.degrees(radians, out=radians), out=radians if out is None else out)
+    # Same folding as the old calculate_angle: > 180 -> 360 - angle
+    np.subtract(360.0, angles, out=angles, where=angles > 180.0)
+    return angles
+
+
+def joint_angle_rates(landmarks, velocity, out=None):
+    """Rate of change (degrees/s) of every joint_angles() angle.
+
+    velocity holds each landmark's d(x, y)/dt, shaped like landmarks
+    ((33, k) or (T, 33, k), k >= 2), e.g. the landmark filter's estimate.
+    Positive means the reported angle is opening. Result is (4,) or (T, 4)
+    in ANGLE_NAMES order.
+    """
+    lm = np.asarray(landmarks)
+    v = np.asarray(velocity)
+    x, y = lm[..., 0], lm[..., 1]
+    vx, vy = v[..., 0], v[..., 1]
+    bx, by = x[..., _B], y[..., _B]
+    vbx, vby = vx[..., _B], vy[..., _B]
+
+    # d/dt atan2(dy, dx) = (dx * d(dy) - dy * d(dx)) / |d|^2 for each arm segment
+    cx, cy = x[..., _C] - bx, y[..., _C] - by
+    ax, ay = x[..., _A] - bx, y[..., _A] - by
+    rate = (cx * (vy[..., _C] - vby) - cy * (vx[..., _C] - vbx)) / (cx * cx + cy * cy + 1e-12)
+    rate -= (ax * (vy[..., _A] - vby) - ay * (vx[..., _A] - vbx)) / (ax * ax + ay * ay + 1e-12)
+
+    # Follow joint_angles' abs() and > 180 folding
+    degrees = np.degrees(np.arctan2(cy, cx) - np.arctan2(ay, ax))
+    sign = np.sign(degrees)
+    sign[np.abs(degrees) > 180.0] *= -1
+    rate *= sign
+    return np.degrees(rate, out=rate if out is None else out)
@@ -0,0 +1,260 @@
+import itertools
+import os
+import threading
+import time
+
+import numpy as np
+
+# Same settings the trackers used when each built its own Pose
+DEFAULT_POSE_OPTIONS = dict(
+    static_image_mode=False,
+    model_complexity=1,
+    smooth_landmarks=True,
+    enable_segmentation=False,
+    min_detection_confidence=0.7,
+    min_tracking_confidence=0.7
+)
+DEFAULT_MAX_GRAPHS = 4
+# Blank frame run through every graph warm() loads
+WARM_FRAME_SHAPE = (480, 640, 3)
+
+
+def _rss_bytes():
+    """Resident set size of this process, 0 if it can't be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+
+class _PooledGraph:
+    __slots__ = ("pose", "owner", "used", "last_used", "memory_bytes")
+
+    def __init__(self, pose, memory_bytes):
+        self.pose = pose
+        self.owner = None
+        self.used = False
+        self.last_used = 0.0
+        self.memory_bytes = memory_bytes
+
+
+class PoseEngine:
+    """Bounded pool of MediaPipe Pose graphs shared by every stream.
+
+    Each stream keeps affinity to the graph it used last, so as long as there
+    are at most max_graphs active streams every stream keeps MediaPipe's
+    frame-to-frame tracking. When streams outnumber graphs an idle graph is
+    handed over and reset first, so one stream's tracking ROI never leaks
+    into another.
+    """
+
+    def __init__(self, max_graphs=DEFAULT_MAX_GRAPHS, checkout_timeout=None, **pose_options):
+        self.options = dict(DEFAULT_POSE_OPTIONS, **pose_options)
+        self.max_graphs = max_graphs
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition()
+        self._graphs = []
+        self._idle = []
+        self._pending = 0
+        self._affinity = {}
+        self._stream_ids = itertools.count(1)
+
+        # Metrics
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._handoffs = 0
+
+    def sibling(self, **pose_options):
+        """Process-wide engine of the same kind for other Pose options"""
+        return get_engine(**pose_options)
+
+    def open_stream(self):
+        """Return a new stream id for a tracker / WebRTC session"""
+        return next(self._stream_ids)
+
+    def release(self, stream_id):
+        """Forget a stream so its graph can be reused without stealing"""
+        with self._cond:
+            self._affinity.pop(stream_id, None)
+            self._cond.notify_all()
+
+    def process(self, stream_id, image_rgb):
+        """Run pose.process on image_rgb with a graph checked out for stream_id"""
+        graph = self._checkout(stream_id)
+        try:
+            return graph.pose.process(image_rgb)
+        finally:
+            self._checkin(graph)
+
+    def warm(self, count=1):
+        """Load up to count graphs ahead of time so no stream pays the model load.
+
+        Each new graph also runs one inference on a blank frame: the first
+        process() call sets up the TFLite delegate (~0.2s on CPU), ten times
+        a normal frame.
+        """
+        with self._cond:
+            missing = min(count, self.max_graphs) - len(self._graphs) - self._pending
+            if missing <= 0:
+                return
+            self._pending += missing
+
+        for created in range(missing):
+            graph = None
+            try:
+                graph = self._create_graph(prime=True)
+            finally:
+                with self._cond:
+                    if graph is None:
+                        # Load failed: give back every slot we reserved
+                        self._pending -= missing - created
+                    else:
+                        self._pending -= 1
+                        self._graphs.append(graph)
+                        self._idle.append(graph)
+                    self._cond.notify_all()
+
+    def _create_graph(self, prime=False):
+        # Imported on the first graph load: mediapipe takes about a second to
+        # import, which merely importing this module shouldn't cost
+        import mediapipe as mp
+
+        before = _rss_bytes()
+        pose = mp.solutions.pose.Pose(**self.options)
+        if prime:
+            # No pose in a blank frame, so no tracking state to clear (reset()
+            # would restart the graph and undo the warm-up)
+            pose.process(np.zeros(WARM_FRAME_SHAPE, dtype=np.uint8))
+        return _PooledGraph(pose, max(_rss_bytes() - before, 0))
+
+    def _pick_idle(self, stream_id):
+        own = self._affinity.get(stream_id)
+        if own is not None:
+            # Our graph is busy (concurrent call from the same stream): wait for it
+            return own if own in self._idle else None
+        if not self._idle:
+            return None
+        # Prefer graphs nobody holds affinity to, then the least recently used
+        free = [g for g in self._idle if self._affinity.get(g.owner) is not g]
+        return min(free or self._idle, key=lambda g: g.last_used)
+
+    def _checkout(self, stream_id):
+        start = time.perf_counter()
+        deadline = None if self.checkout_timeout is None else start + self.checkout_timeout
+        graph = None
+
+        with self._cond:
+            while True:
+                graph = self._pick_idle(stream_id)
+                if graph is not None:
+                    self._idle.remove(graph)
+                    break
+                if stream_id not in self._affinity and \
+                   len(self._graphs) + self._pending < self.max_graphs:
+                    self._pending += 1
+                    break
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No pose graph free after {self.checkout_timeout}s")
+                self._cond.wait(remaining)
+
+        if graph is None:
+            # Model load happens outside the lock so other streams keep running
+            try:
+                graph = self._create_graph()
+            finally:
+                with self._cond:
+                    self._pending -= 1
+                    if graph is not None:
+                        self._graphs.append(graph)
+                    else:
+                        self._cond.notify_all()
+
+        handoff = graph.owner != stream_id and graph.used
+        with self._cond:
+            if graph.owner != stream_id:
+                if self._affinity.get(graph.owner) is graph:
+                    del self._affinity[graph.owner]
+                graph.owner = stream_id
+                self._affinity[stream_id] = graph
+            waited = time.perf_counter() - start
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            if handoff:
+                self._handoffs += 1
+
+        if handoff:
+            # Drop the previous stream's tracking state
+            graph.pose.reset()
+        return graph
+
+    def _checkin(self, graph):
+        with self._cond:
+            graph.used = True
+            graph.last_used = time.monotonic()
+            self._idle.append(graph)
+            self._cond.notify_all()
+
+    def metrics(self):
+        """Pool size, memory per graph and checkout wait time"""
+        with self._cond:
+            n = len(self._graphs)
+            memory = sum(g.memory_bytes for g in self._graphs)
+            return {
+                "pool_size": n,
+                "max_graphs": self.max_graphs,
+                "in_use": n - len(self._idle),
+                "streams": len(self._affinity),
+                "graph_memory_mb": memory / n / 2**20 if n else 0.0,
+                "checkouts": self._checkouts,
+                "checkout_wait_avg_ms": 1000 * self._wait_total / self._checkouts if self._checkouts else 0.0,
+                "checkout_wait_max_ms": 1000 * self._wait_max,
+                "handoffs": self._handoffs,
+            }
+
+    def close(self):
+        with self._cond:
+            for g in self._graphs:
+                try:
+                    g.pose.close()
+                except Exception as e:
+                    print(f"Error closing pose graph: {e}")
+            self._graphs.clear()
+            self._idle.clear()
+            self._affinity.clear()
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(max_graphs=DEFAULT_MAX_GRAPHS, **pose_options):
+    """Process-wide engine for the given Pose options (created on first use)"""
+    options = dict(DEFAULT_POSE_OPTIONS, **pose_options)
+    key = (max_graphs, tuple(sorted(options.items())))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = PoseEngine(max_graphs, **options)
+        return engine
+
+
+def warm_in_background(engine, count=1):
+    """Start engine.warm(count) on a daemon thread and return the thread.
+
+    Covers the mediapipe import, model load and first inference, so a
+    stream starting later finds a ready graph and the caller isn't blocked.
+    """
+    def run():
+        try:
+            engine.warm(count)
+        except Exception as e:
+            print(f"[pose engine] warm-up failed: {e}")
+
+    thread = threading.Thread(target=run, name="pose-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,167 @@
+import time
+
+import numpy as np
+from landmark_buffer import LandmarkBuffer
+from frame_buffers import FrameBufferPool
+from frame_skip import AdaptiveFrameSkipper, LandmarkExtrapolator
+from complexity_tuner import ComplexityTuner
+from motion_gate import MotionGate
+from landmark_filter import LandmarkFilter
+
+
+class PosePipeline:
+    """Per-stream detection stage in front of the tracker rep logic.
+
+    Runs inference through the shared PoseEngine when the frame skipper says
+    there is time for it, and otherwise extrapolates the latest landmarks to
+    the current frame. Either way the result lands in self.landmarks in
+    full-frame coordinates, so the rep state machine keeps advancing on every
+    frame.
+
+    Pass roi=PoseROI() to run inference on a crop around the previous pose
+    (full frame when tracking is lost). MediaPipe already tracks its own ROI
+    between frames, so on the pose_roi.py benchmark the crop is no faster,
+    and every time the crop moves the graph's tracking has to restart.
+
+    The complexity tuner may move the stream to a lighter or heavier pose
+    graph; landmarks, extrapolation history and the ROI stay with the
+    pipeline, so tracking carries over to the new graph. Pass tuner=False to
+    pin the engine's model_complexity.
+
+    The motion gate skips inference on frames where nothing moved (between
+    sets, holds, nobody in view) and keeps the last landmarks, which stay
+    exact for a still scene. Pass gate=False to run on every frame.
+
+    Inferred landmarks go through a One Euro filter (in frame coordinates,
+    so ROI moves don't show up as motion). It removes the frame-to-frame
+    jitter that lets the lite graph's angles flap across thresholds, and
+    its velocity estimate gives landmarks.velocity / angle_rates. Pass
+    filter=False for raw landmarks.
+
+    Set timing to a StageTimer to record the convert and pose stages.
+    """
+
+    def __init__(self, engine, stream_id=None, skipper=None, extrapolator=None, roi=False,
+                 tuner=None, gate=None, filter=None):
+        self.engine = engine
+        self.stream_id = engine.open_stream() if stream_id is None else stream_id
+        self.landmarks = LandmarkBuffer()
+        self.buffers = FrameBufferPool()
+        self.skipper = skipper or AdaptiveFrameSkipper()
+        self.extrapolator = extrapolator or LandmarkExtrapolator()
+        self.roi = roi
+        self.tuner = ComplexityTuner.for_engine(engine) if tuner is None else tuner
+        self.gate = MotionGate() if gate is None else gate
+        self.filter = LandmarkFilter() if filter is None else filter
+        self.timing = None
+        # Crop the last pose was found in (None: full frame, False: no pose)
+        self._tracked_box = False
+
+    def reset(self):
+        self.extrapolator.clear()
+        if self.roi:
+            self.roi.reset()
+        if self.gate:
+            self.gate.reset()
+        if self.filter:
+            self.filter.reset()
+        self.landmarks.valid = False
+        self._tracked_box = False
+
+    def set_engine(self, engine):
+        """Move this stream to another engine (e.g. a different model tier)"""
+        self.engine.release(self.stream_id)
+        self.engine = engine
+        self.stream_id = engine.open_stream()
+
+    def restart_tracking(self):
+        """Drop MediaPipe's tracking state for this stream (a new stream id gets a reset graph)"""
+        self.engine.release(self.stream_id)
+        self.stream_id = self.engine.open_stream()
+
+    def close(self):
+        self.engine.release(self.stream_id)
+
+    def detect(self, frame, now, bgr=True):
+        """Landmarks for a frame (BGR, or RGB with bgr=False) at monotonic time now.
+
+        Returns self.landmarks (angles computed), or None if there is no pose.
+        """
+        self.buffers.tick()
+        if self.tuner:
+            engine = self.tuner.poll(now)
+            if engine is not None:
+                self.set_engine(engine)
+
+        if self.gate and self.gate.is_static(frame, now):
+            # Still scene: the last pose (or no pose) holds, and isn't moving
+            lm = self.landmarks
+            if not lm.valid:
+                return None
+            self.extrapolator.push(lm.data, now)
+            lm.velocity.fill(0)
+            lm.angle_rates.fill(0)
+            return lm
+
+        if self.skipper.should_infer():
+            timing = self.timing
+            if timing:
+                t = time.perf_counter()
+            # Box comes from the previous (possibly extrapolated) landmarks
+            box = self.roi.box(self.landmarks, frame.shape) if self.roi else None
+            if self.roi and self._tracked_box is not False and box != self._tracked_box:
+                # The crop moved or resized: MediaPipe's smoothing would blend
+                # landmarks from two different coordinate frames
+                self.restart_tracking()
+                self.roi.restarts += 1
+            if box is None:
+                image = self.buffers.to_rgb(frame) if bgr else frame
+            else:
+                image = self.roi.crop(frame, box)
+                image = self.buffers.to_rgb(image, name="rgb_roi") if bgr else image
+            if timing and bgr:
+                timing.lap("convert", t)
+            writeable = image.flags.writeable
+            image.flags.writeable = False
+            start = time.perf_counter()
+            try:
+                results = self.engine.process(self.stream_id, image)
+            finally:
+                # Even if inference fails: the caller still draws on / reuses the frame
+                image.flags.writeable = writeable
+            cost = time.perf_counter() - start
+            self.skipper.record(cost)
+            if timing:
+                timing.record("pose", cost)
+            if self.tuner:
+                self.tuner.record(cost, now)
+            if self.gate:
+                self.gate.accept(now, cost)
+
+            lm = self.landmarks.update(results.pose_landmarks)
+            self._tracked_box = False if lm is None else box
+            if lm is None:
+                self.extrapolator.clear()
+                if self.filter:
+                    self.filter.reset()
+                return None
+            if box is not None:
+                self.roi.to_frame(lm.data, box, frame.shape)
+            if self.filter:
+                self.filter(lm.data[:, :3], now)
+                np.copyto(lm.velocity, self.filter.velocity)
+                lm.compute_rates()
+            if box is not None or self.filter:
+                lm.compute_angles()
+            self.extrapolator.push(lm.data, now)
+            return lm
+
+        # Skipped frame: move the last pose forward to the live frame
+        if not self.extrapolator.predict(now, self.landmarks.data):
+            return None
+        lm = self.landmarks
+        lm.valid = True
+        lm.compute_angles()
+        np.copyto(lm.velocity, self.extrapolator.velocity)
+        lm.compute_rates()
+        return lm
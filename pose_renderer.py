@@ -0,0 +1,168 @@
+import sys
+import time
+
+import cv2
+import numpy as np
+from landmark_buffer import X, Y, VISIBILITY
+
+# Same as mp.solutions.pose.POSE_CONNECTIONS
+POSE_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20), (11, 23),
+    (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28), (27, 29),
+    (28, 30), (29, 31), (30, 32), (27, 31), (28, 32)
+], dtype=np.intp)
+
+# mp_drawing skips landmarks below this visibility
+VISIBILITY_THRESHOLD = 0.5
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+class _TextSlot:
+    """A text position whose raster is rebuilt only when the text changes"""
+
+    def __init__(self):
+        self.key = None
+        self.offset = (0, 0)
+        self.mask = None
+        self.color = None
+
+    def render(self, text, scale, color, thickness):
+        key = (text, scale, color, thickness)
+        if key == self.key:
+            return
+        (w, h), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+        pad = thickness
+        mask = np.zeros((h + baseline + 2 * pad, w + 2 * pad), dtype=np.uint8)
+        cv2.putText(mask, text, (pad, h + pad), FONT, scale, 255, thickness)
+        self.key = key
+        self.offset = (-pad, -h - pad)
+        self.mask = mask.astype(bool)[..., None]
+        self.color = np.empty((*mask.shape, 3), dtype=np.uint8)
+        self.color[:] = color
+
+
+class PoseRenderer:
+    """Skeleton + HUD drawing shared by all trackers.
+
+    The whole skeleton is two cv2.polylines calls straight from the (33, 4)
+    landmark array: one for POSE_CONNECTIONS, one for the joints (drawn as
+    zero-length thick segments). HUD text is rasterised into a cached mask per
+    position and only re-rendered when its value changes; static panels are
+    rendered once into a cached layer.
+    """
+
+    def __init__(self, line_thickness=2, point_size=7):
+        self.line_thickness = line_thickness
+        self.point_size = point_size
+        self._slots = {}
+        self._panels = {}
+        self._px = np.empty((len(POSE_CONNECTIONS), 2, 2), dtype=np.int32)
+        self._points = np.empty((33, 2, 2), dtype=np.int32)
+
+    def draw_pose(self, image, data, color=(224, 224, 224), point_color=None):
+        """Draw the skeleton for a (33, 4) normalized landmark array"""
+        h, w = image.shape[:2]
+        x = data[:, X]
+        y = data[:, Y]
+        shown = (data[:, VISIBILITY] >= VISIBILITY_THRESHOLD) & \
+                (x >= 0) & (x <= 1) & (y >= 0) & (y <= 1)
+
+        points = self._points
+        points[:, 0, 0] = x * w
+        points[:, 0, 1] = y * h
+        points[:, 1] = points[:, 0]
+
+        lines = self._px
+        lines[:] = points[POSE_CONNECTIONS, 0]
+        keep = shown[POSE_CONNECTIONS].all(axis=1)
+        if keep.any():
+            cv2.polylines(image, lines[keep], False, color, self.line_thickness)
+        if shown.any():
+            cv2.polylines(image, points[shown], False, point_color or color, self.point_size)
+        return image
+
+    def text(self, image, text, org, scale, color, thickness=2):
+        """cv2.putText replacement that caches the raster per org"""
+        slot = self._slots.get(org)
+        if slot is None:
+            slot = self._slots[org] = _TextSlot()
+        slot.render(text, scale, color, thickness)
+        self._blit(image, org[0] + slot.offset[0], org[1] + slot.offset[1], slot.mask, slot.color)
+
+    def panel(self, image, rect, color):
+        """Filled rectangle (static HUD background) from a cached layer"""
+        key = (rect, color)
+        layer = self._panels.get(key)
+        if layer is None:
+            (x0, y0), (x1, y1) = rect
+            layer = np.empty((y1 - y0 + 1, x1 - x0 + 1, 3), dtype=np.uint8)
+            layer[:] = color
+            self._panels[key] = layer
+        x0, y0 = rect[0]
+        h, w = image.shape[:2]
+        lh, lw = layer.shape[:2]
+        image[y0:y0 + lh, x0:x0 + lw] = layer[:max(0, h - y0), :max(0, w - x0)]
+
+    @staticmethod
+    def _blit(image, x, y, mask, color):
+        h, w = image.shape[:2]
+        mh, mw = mask.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + mw, w), min(y + mh, h)
+        if x1 <= x0 or y1 <= y0:
+            return
+        sx, sy = x0 - x, y0 - y
+        np.copyto(image[y0:y1, x0:x1], color[sy:sy + y1 - y0, sx:sx + x1 - x0],
+                  where=mask[sy:sy + y1 - y0, sx:sx + x1 - x0])
+
+
+def benchmark(width=1280, height=720, runs=300):
+    """ms per frame: mp_drawing + cv2.putText vs PoseRenderer"""
+    import mediapipe as mp
+    from mediapipe.framework.formats import landmark_pb2
+
+    rng = np.random.default_rng(0)
+    data = np.zeros((33, 4), dtype=np.float32)
+    data[:, :2] = rng.uniform(0.2, 0.8, (33, 2))
+    data[:, VISIBILITY] = 1.0
+    proto = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, v in data.tolist():
+        proto.landmark.add(x=x, y=y, z=z, visibility=v)
+    spec = mp.solutions.drawing_utils.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    renderer = PoseRenderer()
+
+    def old(i):
+        mp.solutions.drawing_utils.draw_landmarks(image, proto, mp.solutions.pose.POSE_CONNECTIONS, spec, spec)
+        cv2.putText(image, f'Angle: {i // 10}', (10, 30), FONT, 0.7, (0, 255, 0), 2)
+        cv2.putText(image, f'Count: {i // 100}', (10, 60), FONT, 0.7, (0, 0, 0), 2)
+        cv2.putText(image, 'State: up', (10, 90), FONT, 0.6, (255, 140, 0), 2)
+        cv2.putText(image, 'Lower Slowly', (10, 120), FONT, 0.6, (255, 255, 255), 2)
+
+    def new(i):
+        renderer.draw_pose(image, data, (0, 255, 0))
+        renderer.text(image, f'Angle: {i // 10}', (10, 30), 0.7, (0, 255, 0))
+        renderer.text(image, f'Count: {i // 100}', (10, 60), 0.7, (0, 0, 0))
+        renderer.text(image, 'State: up', (10, 90), 0.6, (255, 140, 0))
+        renderer.text(image, 'Lower Slowly', (10, 120), 0.6, (255, 255, 255))
+
+    timings = {}
+    for name, fn in (("mp_drawing", old), ("renderer", new)):
+        fn(0)
+        start = time.perf_counter()
+        for i in range(runs):
+            fn(i)
+        timings[name] = 1000 * (time.perf_counter() - start) / runs
+    return timings
+
+
+# Benchmark: python pose_renderer.py [width height]
+if __name__ == "__main__":
+    size = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (1280, 720)
+    t = benchmark(*size)
+    print(f"{size[0]}x{size[1]}  mp_drawing + putText: {t['mp_drawing']:.3f} ms/frame  "
+          f"PoseRenderer: {t['renderer']:.3f} ms/frame  "
+          f"speedup: {t['mp_drawing'] / t['renderer']:.2f}x")
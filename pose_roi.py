@@ -0,0 +1,188 @@
+import sys
+import time
+
+import cv2
+import numpy as np
+from landmark_buffer import X, Y, Z, VISIBILITY
+
+
+class PoseROI:
+    """Region of interest around the tracked body.
+
+    The box is a padded square around the previous frame's visible
+    landmarks, cropped and resized to a fixed inference resolution. It is
+    kept while the body stays well inside it, so MediaPipe sees a stable
+    image between frames. Without a valid previous pose box() returns None
+    and the caller runs full-frame detection.
+    """
+
+    def __init__(self, size=256, padding=0.3, min_visibility=0.5, min_side=96):
+        self.size = size
+        self.padding = padding
+        self.min_visibility = min_visibility
+        self.min_side = min_side
+        self.current = None
+        self._crop = np.empty((size, size, 3), dtype=np.uint8)
+
+        self.crops = 0
+        self.full_frames = 0
+        # Graph tracking restarts because the crop changed (counted by PosePipeline)
+        self.restarts = 0
+
+    def reset(self):
+        self.current = None
+
+    def box(self, landmarks, frame_shape):
+        """(x0, y0, side) in pixels, or None to use the full frame"""
+        h, w = frame_shape[:2]
+        if not landmarks.valid:
+            self.current = None
+            self.full_frames += 1
+            return None
+
+        d = landmarks.data
+        visible = d[:, VISIBILITY] >= self.min_visibility
+        if visible.sum() < 4:
+            self.current = None
+            self.full_frames += 1
+            return None
+
+        xs = d[visible, X] * w
+        ys = d[visible, Y] * h
+        x_min, x_max = xs.min(), xs.max()
+        y_min, y_max = ys.min(), ys.max()
+        need = max(x_max - x_min, y_max - y_min)
+
+        if self.current is not None:
+            # Keep the box while the body stays inside its inner margin
+            x0, y0, side = self.current
+            margin = side * self.padding / (2 * (1 + 2 * self.padding))
+            if x_min >= x0 + margin and x_max <= x0 + side - margin and \
+               y_min >= y0 + margin and y_max <= y0 + side - margin and \
+               need * (1 + 2 * self.padding) > side * 0.6:
+                self.crops += 1
+                return self.current
+
+        side = int(max(need * (1 + 2 * self.padding), self.min_side))
+        if side >= min(h, w):
+            self.current = None
+            self.full_frames += 1
+            return None
+        cx = (x_min + x_max) / 2
+        cy = (y_min + y_max) / 2
+        x0 = int(min(max(cx - side / 2, 0), w - side))
+        y0 = int(min(max(cy - side / 2, 0), h - side))
+        self.current = (x0, y0, side)
+        self.crops += 1
+        return self.current
+
+    def crop(self, frame, box):
+        """Crop box out of frame, resized into a reused size x size buffer"""
+        x0, y0, side = box
+        return cv2.resize(frame[y0:y0 + side, x0:x0 + side], (self.size, self.size),
+                          dst=self._crop, interpolation=cv2.INTER_AREA)
+
+    def to_frame(self, data, box, frame_shape):
+        """Map (33, 4) landmarks from crop coordinates back to the full frame, in place"""
+        h, w = frame_shape[:2]
+        x0, y0, side = box
+        data[:, X] *= side / w
+        data[:, X] += x0 / w
+        data[:, Y] *= side / h
+        data[:, Y] += y0 / h
+        data[:, Z] *= side / w
+        return data
+
+
+def person_frame(width=1920, height=1080, scale=0.5):
+    """Plain frame with a flat-shaded figure (scale of the frame height) standing in the middle.
+
+    MediaPipe finds a pose in it. Past about 0.6 the padded box no longer
+    fits the frame, so PoseROI stays on the full frame.
+    """
+    frame = np.full((height, width, 3), (200, 205, 210), dtype=np.uint8)
+    # The figure is 860 units tall
+    s = height * scale / 860
+    cx, top = width // 2, int((height - 860 * s) / 2)
+
+    def at(x, y):
+        return int(cx + x * s), int(top + y * s)
+
+    skin, shirt, pants = (150, 180, 225), (60, 60, 160), (90, 60, 40)
+    cv2.ellipse(frame, at(0, 60), (int(45 * s), int(58 * s)), 0, 0, 360, skin, -1)
+    for x in (-18, 18):
+        cv2.circle(frame, at(x, 50), int(6 * s), (40, 40, 40), -1)
+    cv2.ellipse(frame, at(0, 88), (int(15 * s), int(5 * s)), 0, 0, 180, (60, 60, 120), -1)
+    cv2.rectangle(frame, at(-20, 110), at(20, 135), skin, -1)
+    cv2.fillPoly(frame, [np.array([at(-95, 140), at(95, 140), at(75, 420), at(-75, 420)])], shirt)
+    for side in (-1, 1):
+        cv2.line(frame, at(side * 90, 155), at(side * 150, 330), shirt, int(42 * s))
+        cv2.line(frame, at(side * 150, 330), at(side * 165, 490), skin, int(34 * s))
+        cv2.circle(frame, at(side * 167, 510), int(24 * s), skin, -1)
+        cv2.line(frame, at(side * 45, 420), at(side * 55, 640), pants, int(60 * s))
+        cv2.line(frame, at(side * 55, 640), at(side * 60, 820), pants, int(50 * s))
+        cv2.ellipse(frame, at(side * 70, 835), (int(40 * s), int(18 * s)), 0, 0, 360, (30, 30, 30), -1)
+    return frame
+
+
+def benchmark(engine, frame, runs=60):
+    """ms per frame through PosePipeline with full-frame vs ROI inference on one image.
+
+    Neither pipeline gates, skips or filters frames, and the two are timed
+    interleaved. The ROI one only crops once it has found a pose, so the
+    frame needs a person in it (crop_rate says how often it cropped).
+    """
+    from pose_pipeline import PosePipeline
+    from frame_skip import AdaptiveFrameSkipper
+
+    # A graph per pipeline, so neither takes over (and resets) the other's
+    engine.warm(2)
+    pipelines = {name: PosePipeline(engine, skipper=AdaptiveFrameSkipper(max_skip=0), roi=roi,
+                                    tuner=False, gate=False, filter=False)
+                 for name, roi in (("full_frame", False), ("roi", PoseROI()))}
+    # Graph load, first inference and the first crop's tracking restart
+    for i in range(3):
+        for pipeline in pipelines.values():
+            pipeline.detect(frame, i / 30)
+    roi = pipelines["roi"].roi
+    roi.crops = roi.full_frames = 0
+
+    totals = dict.fromkeys(pipelines, 0.0)
+    for i in range(3, 3 + runs):
+        for name, pipeline in pipelines.items():
+            start = time.perf_counter()
+            pipeline.detect(frame, i / 30)
+            totals[name] += time.perf_counter() - start
+    for pipeline in pipelines.values():
+        pipeline.close()
+
+    timings = {name: 1000 * total / runs for name, total in totals.items()}
+    timings["crop_rate"] = roi.crops / max(roi.crops + roi.full_frames, 1)
+    timings["restarts"] = roi.restarts
+    return timings
+
+
+# Benchmark: python pose_roi.py [image_or_video] [width height]
+# (drawn figures at a few sizes by default; a real workout frame gives representative numbers)
+if __name__ == "__main__":
+    from pose_engine import get_engine
+
+    width, height = (int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) > 3 else (1920, 1080)
+    frames = {}
+    if len(sys.argv) > 1:
+        frame = cv2.imread(sys.argv[1])
+        if frame is None:
+            cap = cv2.VideoCapture(sys.argv[1])
+            ok, frame = cap.read()
+            cap.release()
+        frames[sys.argv[1]] = cv2.resize(frame, (width, height))
+    else:
+        for scale in (0.3, 0.5, 0.75):
+            frames[f"figure {scale:.0%} of height"] = person_frame(width, height, scale)
+
+    engine = get_engine()
+    for name, frame in frames.items():
+        t = benchmark(engine, frame)
+        print(f"{width}x{height} {name}: full frame {t['full_frame']:.1f} ms/frame, "
+              f"ROI {PoseROI().size}px {t['roi']:.1f} ms/frame ({100 * t['crop_rate']:.0f}% cropped, "
+              f"{t['restarts']} tracking restarts), speedup {t['full_frame'] / t['roi']:.2f}x")
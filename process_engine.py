@@ -0,0 +1,341 @@
+import atexit
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+from pose_engine import DEFAULT_POSE_OPTIONS, WARM_FRAME_SHAPE, PoseEngine
+from pose_angles import NUM_LANDMARKS
+
+# One worker process per core by default
+DEFAULT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+# Frames in flight per worker (copy of the next frame overlaps the current inference)
+DEFAULT_SLOTS = 2
+# Largest frame a ring slot holds (height, width, channels)
+DEFAULT_MAX_FRAME = (1080, 1920, 3)
+
+
+class LandmarkResults:
+    """pose.process() result from a worker: pose_landmarks is a (33, 4) array or None"""
+
+    __slots__ = ("pose_landmarks",)
+
+    def __init__(self, pose_landmarks):
+        self.pose_landmarks = pose_landmarks
+
+
+def _worker_main(frame_name, result_name, slots, slot_bytes, options, conn):
+    """Worker process: one Pose graph per stream, frames read from the ring"""
+    import mediapipe as mp
+
+    frames = shared_memory.SharedMemory(name=frame_name)
+    results = shared_memory.SharedMemory(name=result_name)
+    out = np.ndarray((slots, NUM_LANDMARKS, 4), dtype=np.float32, buffer=results.buf)
+    graphs = {}
+    spare = []
+    try:
+        while True:
+            msg = conn.recv()
+            kind = msg[0]
+            if kind == "process":
+                _, req, stream_id, slot, shape = msg
+                try:
+                    pose = graphs.get(stream_id)
+                    if pose is None:
+                        pose = graphs[stream_id] = spare.pop() if spare else \
+                            mp.solutions.pose.Pose(**options)
+                    frame = np.ndarray(shape, dtype=np.uint8, buffer=frames.buf,
+                                       offset=slot * slot_bytes)
+                    landmarks = pose.process(frame).pose_landmarks
+                    if landmarks is not None:
+                        d = out[slot]
+                        for i, lm in enumerate(landmarks.landmark):
+                            d[i] = (lm.x, lm.y, lm.z, lm.visibility)
+                    conn.send((req, landmarks is not None))
+                except Exception as e:
+                    conn.send((req, f"{type(e).__name__}: {e}"))
+            elif kind == "warm":
+                pose = mp.solutions.pose.Pose(**options)
+                # First inference sets up the TFLite delegate: do it before a stream needs it
+                pose.process(np.zeros(WARM_FRAME_SHAPE, dtype=np.uint8))
+                spare.append(pose)
+                conn.send((msg[1], True))
+            elif kind == "release":
+                pose = graphs.pop(msg[1], None)
+                if pose is not None:
+                    # Drop the stream's tracking state before reusing the graph
+                    pose.reset()
+                    spare.append(pose)
+            elif kind == "close":
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        for pose in itertools.chain(graphs.values(), spare):
+            pose.close()
+        del out
+        frames.close()
+        results.close()
+
+
+class _Worker:
+    """Parent side of one worker process: frame ring, result array, reply router"""
+
+    def __init__(self, ctx, index, options, slots, slot_bytes):
+        self.slot_bytes = slot_bytes
+        self.frames = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.results = shared_memory.SharedMemory(create=True, size=slots * NUM_LANDMARKS * 4 * 4)
+        self.landmarks = np.ndarray((slots, NUM_LANDMARKS, 4), dtype=np.float32,
+                                    buffer=self.results.buf)
+        # Free ring slots, handed out in order
+        self.free = queue.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+        self.streams = 0
+
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, name=f"pose-worker-{index}", daemon=True,
+            args=(self.frames.name, self.results.name, slots, slot_bytes, options, child))
+        self.process.start()
+        child.close()
+
+        self._send_lock = threading.Lock()
+        self._pending = {}
+        self._requests = itertools.count()
+        self._receiver = threading.Thread(target=self._receive, name=f"pose-worker-{index}-rx",
+                                          daemon=True)
+        self._receiver.start()
+
+    def _receive(self):
+        while True:
+            try:
+                req, value = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            waiter = self._pending.pop(req)
+            waiter[1] = value
+            waiter[0].set()
+        # Worker gone: fail everything still waiting
+        for waiter in list(self._pending.values()):
+            waiter[1] = "worker process exited"
+            waiter[0].set()
+
+    def call(self, kind, *args):
+        req = next(self._requests)
+        waiter = [threading.Event(), None]
+        self._pending[req] = waiter
+        self.send(kind, req, *args)
+        waiter[0].wait()
+        if isinstance(waiter[1], str):
+            raise RuntimeError(f"Pose worker error: {waiter[1]}")
+        return waiter[1]
+
+    def send(self, *msg):
+        with self._send_lock:
+            self.conn.send(msg)
+
+    def close(self):
+        try:
+            self.send("close")
+        except Exception:
+            pass
+        self.process.join(2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        del self.landmarks
+        for shm in (self.frames, self.results):
+            shm.close()
+            shm.unlink()
+
+
+class ProcessPoseEngine:
+    """PoseEngine interface backed by worker processes.
+
+    Each stream is pinned to one of max_graphs worker processes (the least
+    loaded when it opens), which keeps a Pose graph per stream so tracking
+    carries over between frames. process() copies the frame into a free slot
+    of that worker's shared-memory ring and sends only the slot number and
+    shape down the pipe; the worker writes the (33, 4) landmarks into a
+    shared result array. No frame is pickled, and inference runs outside
+    this process's GIL.
+    """
+
+    def __init__(self, max_graphs=DEFAULT_WORKERS, slots=DEFAULT_SLOTS,
+                 max_frame_shape=DEFAULT_MAX_FRAME, **pose_options):
+        self.options = dict(DEFAULT_POSE_OPTIONS, **pose_options)
+        self.max_graphs = max_graphs
+        self.slots = slots
+        self.slot_bytes = int(np.prod(max_frame_shape))
+
+        self._lock = threading.Lock()
+        self._workers = []
+        self._assigned = {}
+        self._stream_ids = itertools.count(1)
+
+        # Metrics
+        self._calls = 0
+        self._bytes = 0
+        self._rtt_total = 0.0
+        self._rtt_max = 0.0
+
+    def _start(self):
+        with self._lock:
+            if not self._workers:
+                ctx = multiprocessing.get_context("spawn")
+                self._workers = [_Worker(ctx, i, self.options, self.slots, self.slot_bytes)
+                                 for i in range(self.max_graphs)]
+                # Unlink the shared memory even if nobody calls close()
+                atexit.register(self.close)
+            return self._workers
+
+    def sibling(self, **pose_options):
+        """Process-wide engine of the same kind for other Pose options"""
+        return get_process_engine(**pose_options)
+
+    def open_stream(self):
+        workers = self._start()
+        stream_id = next(self._stream_ids)
+        with self._lock:
+            worker = min(workers, key=lambda w: w.streams)
+            worker.streams += 1
+            self._assigned[stream_id] = worker
+        return stream_id
+
+    def release(self, stream_id):
+        with self._lock:
+            worker = self._assigned.pop(stream_id, None)
+            if worker is None:
+                return
+            worker.streams -= 1
+        worker.send("release", stream_id)
+
+    def process(self, stream_id, image_rgb):
+        worker = self._assigned.get(stream_id)
+        if worker is None:
+            raise KeyError(f"Unknown stream {stream_id}")
+        if image_rgb.nbytes > self.slot_bytes or image_rgb.dtype != np.uint8:
+            raise ValueError(f"Frame {image_rgb.shape} {image_rgb.dtype} doesn't fit a "
+                             f"{self.slot_bytes}-byte uint8 ring slot")
+
+        start = time.perf_counter()
+        slot = worker.free.get()
+        try:
+            view = np.ndarray(image_rgb.shape, dtype=np.uint8, buffer=worker.frames.buf,
+                              offset=slot * self.slot_bytes)
+            np.copyto(view, image_rgb)
+            del view
+            found = worker.call("process", stream_id, slot, image_rgb.shape)
+            landmarks = worker.landmarks[slot].copy() if found else None
+        finally:
+            worker.free.put(slot)
+
+        rtt = time.perf_counter() - start
+        with self._lock:
+            self._calls += 1
+            self._bytes += image_rgb.nbytes
+            self._rtt_total += rtt
+            self._rtt_max = max(self._rtt_max, rtt)
+        return LandmarkResults(landmarks)
+
+    def warm(self, count=1):
+        """Start the workers and load (and run once) count spare graphs spread across them"""
+        workers = self._start()
+        for i in range(count):
+            workers[i % len(workers)].call("warm")
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "backend": "processes",
+                "workers": len(self._workers),
+                "max_graphs": self.max_graphs,
+                "streams": len(self._assigned),
+                "ring_mb": len(self._workers) * self.slots * self.slot_bytes / 2**20,
+                "calls": self._calls,
+                "frame_mb_copied": self._bytes / 2**20,
+                "roundtrip_avg_ms": 1000 * self._rtt_total / self._calls if self._calls else 0.0,
+                "roundtrip_max_ms": 1000 * self._rtt_max,
+            }
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._assigned.clear()
+        for worker in workers:
+            worker.close()
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_process_engine(max_graphs=DEFAULT_WORKERS, **pose_options):
+    """Process-wide worker-process engine for the given Pose options"""
+    options = dict(DEFAULT_POSE_OPTIONS, **pose_options)
+    key = (max_graphs, tuple(sorted(options.items())))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = ProcessPoseEngine(max_graphs, **options)
+        return engine
+
+
+def benchmark(engine, frame, streams, seconds=5.0):
+    """Total inferences/s with streams threads calling engine.process back to back"""
+    rgb = np.ascontiguousarray(frame[..., ::-1])
+    engine.warm(streams)
+    ids = [engine.open_stream() for _ in range(streams)]
+    counts = [0] * streams
+    deadline = time.perf_counter() + seconds
+
+    def run(i):
+        while time.perf_counter() < deadline:
+            engine.process(ids[i], rgb)
+            counts[i] += 1
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(streams)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    for stream_id in ids:
+        engine.release(stream_id)
+    return sum(counts) / elapsed
+
+
+# Benchmark: python process_engine.py [image_or_video] [max_workers]
+if __name__ == "__main__":
+    import cv2
+
+    frame = None
+    if len(sys.argv) > 1:
+        frame = cv2.imread(sys.argv[1])
+        if frame is None:
+            cap = cv2.VideoCapture(sys.argv[1])
+            ok, frame = cap.read()
+            cap.release()
+    if frame is None:
+        frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    print(f"{os.cpu_count()} cores, {frame.shape[1]}x{frame.shape[0]} frame")
+    n = 1
+    while n <= max_workers:
+        threads = PoseEngine(n)
+        processes = ProcessPoseEngine(n, max_frame_shape=frame.shape)
+        t = benchmark(threads, frame, n)
+        p = benchmark(processes, frame, n)
+        threads.close()
+        processes.close()
+        print(f"{n:2d} streams / workers: threads {t:6.1f} inferences/s, "
+              f"processes {p:6.1f} inferences/s ({p / t:.2f}x)")
+        n *= 2
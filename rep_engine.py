@@ -0,0 +1,330 @@
+import numpy as np
+
+# Form status per session
+GOOD, WARNING, ERROR = 0, 1, 2
+STATUS_NAMES = ("good", "warning", "error")
+# BGR drawing color per status
+STATUS_COLORS = ((0, 255, 0), (0, 165, 255), (0, 0, 255))
+
+# Rep flags
+STARTED, FAILED, REACHED = 1, 2, 4
+ALL_FLAGS = STARTED | FAILED | REACHED
+
+# Transition source matching every state
+ANY = None
+
+_OPS = {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal}
+
+
+class Transition:
+    """One row of an exercise's transition table.
+
+    Matches a session in state src (ANY: every state) when
+    metric <op> threshold, the session has all flags in requires and none in
+    forbids, and it has spent the src state's hold time there. On a match it
+    moves to dst, updates flags (sets, then clears), optionally counts a rep,
+    records a failure reason, fires an event and sets feedback / status.
+    """
+
+    def __init__(self, src, dst, op, threshold, requires=0, forbids=0, sets=0, clears=0,
+                 count=False, reason=None, event=None, feedback=None, status=GOOD):
+        if op not in _OPS:
+            raise ValueError(f"Unknown comparison {op!r}")
+        self.src = src
+        self.dst = dst
+        self.op = op
+        self.threshold = threshold
+        self.requires = requires
+        self.forbids = forbids
+        self.sets = sets
+        self.clears = clears
+        self.count = count
+        self.reason = reason
+        self.event = event
+        self.feedback = feedback
+        self.status = status
+
+
+class Fault:
+    """Form check evaluated before the transition table.
+
+    test(data, metric) gets the (N, 33, 4) landmark array and the (N,)
+    exercise metric and returns a bool per session. A faulted session takes
+    no transition this frame. If a rep is in progress it is failed with
+    reason (firing event); with restart it also goes back to the initial
+    state and loses REACHED, unless keep_reached (the top of the rep still
+    counts as reached, so the rep ends as failed rather than too short).
+    """
+
+    def __init__(self, name, test, message, reason=None, event=None, restart=True,
+                 feedback=None, status=ERROR, keep_reached=False):
+        self.name = name
+        self.test = test
+        self.message = message
+        self.reason = reason
+        self.event = event
+        self.restart = restart
+        self.feedback = feedback
+        self.status = status
+        self.keep_reached = keep_reached
+
+
+class ExerciseSpec:
+    """Declarative exercise: metric, states, transitions and form faults.
+
+    The metric is the mean of the joint angles listed in angles (indices into
+    LandmarkBuffer.angles). states[0] is the initial state. holds maps a state
+    to the seconds a session must stay in it before any transition out of it
+    can fire; hold_feedback (formatted with held and hold) is shown meanwhile.
+    Feedback strings are formatted with count and reason.
+    """
+
+    def __init__(self, name, angles, states, transitions, faults=(), holds=None,
+                 hold_feedback=None, feedback="Ready"):
+        self.name = name
+        self.angles = tuple(angles)
+        self.states = tuple(states)
+        self.transitions = tuple(transitions)
+        self.faults = tuple(faults)
+        self.holds = dict(holds or {})
+        self.hold_feedback = hold_feedback
+        self.feedback = feedback
+        self._table = None
+
+    def table(self):
+        if self._table is None:
+            self._table = TransitionTable(self)
+        return self._table
+
+
+class TransitionTable:
+    """An ExerciseSpec compiled to integer codes, ready for RepEngine.
+
+    rows holds one tuple per transition in priority order, with states,
+    reasons, events and feedback strings replaced by indices / bit masks.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.angles = spec.angles
+        self.states = spec.states
+        self.hold_feedback = spec.hold_feedback
+
+        self.feedbacks = [spec.feedback]
+        self.reasons = [""]
+        self.events = []
+        state_index = {name: i for i, name in enumerate(spec.states)}
+
+        def state(name):
+            if name not in state_index:
+                raise ValueError(f"{spec.name}: unknown state {name!r}")
+            return state_index[name]
+
+        self.hold = np.zeros(len(spec.states), dtype=np.float64)
+        for name, seconds in spec.holds.items():
+            self.hold[state(name)] = seconds
+
+        self.rows = []
+        for t in spec.transitions:
+            self.rows.append((
+                -1 if t.src is ANY else state(t.src), state(t.dst),
+                _OPS[t.op], np.float32(t.threshold),
+                t.requires, t.forbids, t.sets, ALL_FLAGS & ~t.clears, t.count,
+                self._code(self.reasons, t.reason, 0), self._event(t.event),
+                self._code(self.feedbacks, t.feedback, -1), t.status,
+            ))
+        self.faults = []
+        for f in spec.faults:
+            self.faults.append((
+                f.test, f.restart and not f.keep_reached, f.restart,
+                self._code(self.reasons, f.reason, 0), self._event(f.event),
+                self._code(self.feedbacks, f.feedback, -1), f.status,
+            ))
+
+    @staticmethod
+    def _code(table, value, default):
+        if value is None:
+            return default
+        if value not in table:
+            table.append(value)
+        return table.index(value)
+
+    def _event(self, name):
+        return 0 if name is None else 1 << self._code(self.events, name, 0)
+
+
+class RepEngine:
+    """Steps one exercise's transition table for many sessions at once.
+
+    Per-session state lives in NumPy arrays (state, count, flags, ...), and
+    step() evaluates each table row as a vectorized mask over all sessions,
+    so the per-frame cost doesn't depend on which exercise is running and
+    many streams are stepped with one call. Index 0 is the session used by
+    the single-stream trackers.
+    """
+
+    def __init__(self, spec, sessions=1):
+        self.spec = spec
+        self.table = spec.table()
+        self.sessions = sessions
+
+        self.state = np.zeros(sessions, dtype=np.int32)
+        self.count = np.zeros(sessions, dtype=np.int32)
+        self.flags = np.zeros(sessions, dtype=np.int32)
+        self.reason = np.zeros(sessions, dtype=np.int32)
+        self.feedback_code = np.zeros(sessions, dtype=np.int32)
+        self.status = np.zeros(sessions, dtype=np.int32)
+        self.since = np.zeros(sessions, dtype=np.float64)
+        self.metric = np.zeros(sessions, dtype=np.float32)
+        # Rate of change of the metric (degrees/s), from filtered landmark velocities
+        self.metric_rate = np.zeros(sessions, dtype=np.float32)
+        # Per-frame outputs: fired event bits and the fault index (-1: none)
+        self.events = np.zeros(sessions, dtype=np.int32)
+        self.fault = np.full(sessions, -1, dtype=np.int32)
+
+        self._pending = np.empty(sessions, dtype=bool)
+        self._match = np.empty(sessions, dtype=bool)
+        self._cond = np.empty(sessions, dtype=bool)
+        self._bits = np.empty(sessions, dtype=np.int32)
+        self._held = np.empty(sessions, dtype=np.float64)
+
+    def reset(self, session=slice(None)):
+        """Back to the initial state; session may be an index, slice or mask"""
+        for a in (self.state, self.count, self.flags, self.reason, self.feedback_code,
+                  self.status, self.since, self.metric, self.metric_rate, self.events):
+            a[session] = 0
+        self.fault[session] = -1
+
+    def step(self, data, angles, now, present=None, rates=None):
+        """Advance every session by one frame.
+
+        data is the (N, 33, 4) landmark array and angles the (N, 4) joint
+        angles; sessions with present False (no pose) are left untouched.
+        rates, the (N, 4) angle rates (LandmarkBuffer.angle_rates), gives
+        metric_rate; without it metric_rate stays 0.
+        """
+        t = self.table
+        metric = self.metric
+        metric[:] = angles[:, t.angles[0]]
+        for i in t.angles[1:]:
+            metric += angles[:, i]
+        if len(t.angles) > 1:
+            metric /= len(t.angles)
+        if rates is not None:
+            metric_rate = self.metric_rate
+            metric_rate[:] = rates[:, t.angles[0]]
+            for i in t.angles[1:]:
+                metric_rate += rates[:, i]
+            if len(t.angles) > 1:
+                metric_rate /= len(t.angles)
+
+        pending, match, cond, bits = self._pending, self._match, self._cond, self._bits
+        flags = self.flags
+        if present is None:
+            pending[:] = True
+        else:
+            np.copyto(pending, present)
+        self.events[:] = 0
+        self.fault[:] = -1
+
+        for k, (test, unreach, restart, reason, event, feedback, status) in enumerate(t.faults):
+            np.logical_and(test(data, metric), pending, out=match)
+            if not match.any():
+                continue
+            self.fault[match] = k
+            # Fail the rep in progress (started, not yet failed)
+            np.bitwise_and(flags, STARTED | FAILED, out=bits)
+            np.equal(bits, STARTED, out=cond)
+            cond &= match
+            self._apply(cond, sets=FAILED, reason=reason, event=event)
+            if restart:
+                self._enter(match, 0, now)
+            if unreach:
+                np.bitwise_and(flags, ~REACHED, out=flags, where=match)
+            if feedback >= 0:
+                np.copyto(self.feedback_code, feedback, where=match)
+            pending &= ~match
+
+        # Sessions still inside a state's hold time can't leave it
+        np.subtract(now, self.since, out=self._held)
+        np.greater_equal(self._held, t.hold[self.state], out=cond)
+        pending &= cond
+
+        for (src, dst, op, threshold, requires, forbids, sets, keep, count,
+             reason, event, feedback, status) in t.rows:
+            if src >= 0:
+                np.equal(self.state, src, out=match)
+                match &= pending
+            else:
+                np.copyto(match, pending)
+            op(metric, threshold, out=cond)
+            match &= cond
+            if requires:
+                np.bitwise_and(flags, requires, out=bits)
+                np.equal(bits, requires, out=cond)
+                match &= cond
+            if forbids:
+                np.bitwise_and(flags, forbids, out=bits)
+                np.equal(bits, 0, out=cond)
+                match &= cond
+            if not match.any():
+                continue
+
+            self._apply(match, sets, keep, reason, event)
+            if count:
+                np.add(self.count, 1, out=self.count, where=match)
+            if feedback >= 0:
+                np.copyto(self.feedback_code, feedback, where=match)
+            np.copyto(self.status, status, where=match)
+            self._enter(match, dst, now)
+            pending &= ~match
+        return self
+
+    def _apply(self, mask, sets=0, keep=ALL_FLAGS, reason=0, event=0):
+        flags = self.flags
+        if sets:
+            np.bitwise_or(flags, sets, out=flags, where=mask)
+        if keep != ALL_FLAGS:
+            np.bitwise_and(flags, keep, out=flags, where=mask)
+        if reason:
+            np.copyto(self.reason, reason, where=mask)
+        if event:
+            np.bitwise_or(self.events, event, out=self.events, where=mask)
+
+    def _enter(self, mask, state, now):
+        # Hold timers restart only on an actual state change
+        changed = self._cond
+        np.not_equal(self.state, state, out=changed)
+        changed &= mask
+        np.copyto(self.since, now, where=changed)
+        np.copyto(self.state, state, where=mask)
+
+    # --- Per-session views (for drawing / feedback) ---
+
+    def state_name(self, i=0):
+        return self.table.states[self.state[i]]
+
+    def status_of(self, i=0):
+        """Fault status this frame, else the status of the last transition"""
+        k = self.fault[i]
+        return self.table.faults[k][6] if k >= 0 else int(self.status[i])
+
+    def warning(self, i=0):
+        """Message of the fault hit this frame, or ''"""
+        k = self.fault[i]
+        return self.spec.faults[k].message if k >= 0 else ""
+
+    def event_names(self, i=0):
+        bits = self.events[i]
+        return [name for b, name in enumerate(self.table.events) if bits >> b & 1]
+
+    def feedback(self, i=0, now=None):
+        t = self.table
+        hold = t.hold[self.state[i]]
+        if t.hold_feedback and hold > 0 and now is not None:
+            held = now - self.since[i]
+            if held < hold:
+                return t.hold_feedback.format(held=held, hold=hold)
+        code = self.feedback_code[i]
+        reason = t.reasons[self.reason[i]].replace('_', ' ')
+        return t.feedbacks[code].format(count=int(self.count[i]), reason=reason)
@@ -0,0 +1,113 @@
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+from rep_engine import FAILED
+
+
+class RepTelemetry:
+    """Per-rep detail for every session of a RepEngine.
+
+    observe() runs after each step() and tracks, per session, when the
+    current rep started, the metric's min / max, the longest stay in a hold
+    state and the first failure reason. A rep starts when a session leaves
+    the initial state and ends when a transition takes it back there or
+    when a rep is counted, whichever comes first. A fault restart doesn't
+    end the rep: its failure carries over (as FAILED does in the engine)
+    and the rep ends with the next transition back to the initial state.
+    A failure is logged with one rep only, even while FAILED stays set into
+    the next attempt.
+    Each finished rep is handed to sink as a tuple in database.REP_COLUMNS
+    order:
+
+        (stream, exercise_name, rep, counted, started, duration,
+         min_angle, max_angle, hold_time, failure)
+
+    sink must not block (e.g. database.get_rep_log().put).
+    """
+
+    def __init__(self, reps, sink, stream=None):
+        self.reps = reps
+        self.sink = sink
+        self.stream = stream
+        n = reps.sessions
+        self.start = np.full(n, np.nan)
+        self.min_angle = np.zeros(n, dtype=np.float32)
+        self.max_angle = np.zeros(n, dtype=np.float32)
+        self.hold_time = np.zeros(n)
+        self.failure = np.zeros(n, dtype=np.int32)
+        self._count = reps.count.copy()
+        self._state = reps.state.copy()
+        # FAILED already logged with an ended rep (until the engine clears it)
+        self._reported = np.zeros(n, dtype=bool)
+        self.emitted = 0
+
+    def reset(self, session=slice(None)):
+        self.start[session] = np.nan
+        self.failure[session] = 0
+        self._count[session] = self.reps.count[session]
+        self._state[session] = self.reps.state[session]
+        self._reported[session] = False
+
+    def observe(self, now, present=None):
+        reps = self.reps
+        table = reps.table
+        metric = reps.metric
+        active = ~np.isnan(self.start)
+        if present is not None:
+            active &= present
+        failed_flag = reps.flags & FAILED != 0
+        self._reported &= failed_flag
+
+        if active.any():
+            np.minimum(self.min_angle, metric, out=self.min_angle, where=active)
+            np.maximum(self.max_angle, metric, out=self.max_angle, where=active)
+            hold = table.hold[reps.state]
+            holding = active & (hold > 0)
+            if holding.any():
+                np.maximum(self.hold_time, now - reps.since, out=self.hold_time, where=holding)
+            # First failure of the rep (flags are cleared by the rep-end transition)
+            failed = active & failed_flag & ~self._reported & (self.failure == 0)
+            if failed.any():
+                self.failure[failed] = reps.reason[failed]
+
+        counted = reps.count > self._count
+        # Entered the initial state through a transition this frame (a fault
+        # restart also lands there, but on a frame with a fault)
+        returned = (reps.state == 0) & (self._state != 0) & (reps.fault < 0)
+        ended = ~np.isnan(self.start) & (counted | returned)
+        if ended.any():
+            self._emit(np.flatnonzero(ended), counted, now)
+            self.start[ended] = np.nan
+            self._reported |= ended & failed_flag & (self.failure != 0)
+        np.copyto(self._count, reps.count)
+        np.copyto(self._state, reps.state)
+
+        # Leaving the initial state (or still out of it after a counted rep) starts a rep
+        begin = np.isnan(self.start) & (reps.state != 0)
+        if present is not None:
+            begin &= present
+        if begin.any():
+            self.start[begin] = now
+            self.min_angle[begin] = metric[begin]
+            self.max_angle[begin] = metric[begin]
+            self.hold_time[begin] = 0.0
+            self.failure[begin] = 0
+
+    def _emit(self, sessions, counted, now):
+        reasons = self.reps.table.reasons
+        name = self.reps.spec.name
+        wall = datetime.now()
+        for i in sessions:
+            duration = float(now - self.start[i])
+            stream = self.stream if self.reps.sessions == 1 else f"{self.stream}/{i}"
+            self.sink((stream, name, int(self.reps.count[i]), bool(counted[i]),
+                       wall - timedelta(seconds=duration), duration,
+                       float(self.min_angle[i]), float(self.max_angle[i]),
+                       float(self.hold_time[i]), reasons[self.failure[i]] or None))
+            self.emitted += 1
+
+
+def stream_name(prefix):
+    """Id tying one tracker's reps together in the reps table"""
+    return f"{prefix}-{uuid.uuid4().hex[:12]}"
@@ -0,0 +1,377 @@
+import collections
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from landmark_buffer import X, Y, VISIBILITY
+from landmark_recording import LandmarkRecording
+from landmark_filter import LandmarkFilter
+from pose_angles import (NUM_LANDMARKS, joint_angles, joint_angle_rates, LEFT_SHOULDER, RIGHT_SHOULDER,
+                         LEFT_ELBOW, RIGHT_ELBOW, LEFT_WRIST, RIGHT_WRIST, LEFT_HIP, RIGHT_HIP,
+                         L_SHOULDER_ANGLE)
+from rep_engine import RepEngine, FAILED
+from exercises import SPECS, OVERHEAD_PRESS, LATERAL_RAISE, BICEPS_CURL, APP_EXERCISES
+
+# Sessions stepped together by one RepEngine (bounds the padded batch arrays)
+DEFAULT_BATCH = 256
+
+
+class ReplayCase:
+    """One landmark stream to replay through an exercise spec.
+
+    landmarks is (T, 33, 4), t the (T,) frame times in seconds and present
+    a (T,) bool (False: no pose that frame). expected is an optional label:
+    {"reps": int, "failures": {reason: n}, "feedback": [text], "no_feedback":
+    [text]} (feedback messages that must / must not be shown); only the keys
+    given are checked.
+    """
+
+    def __init__(self, name, spec, landmarks, t, present=None, expected=None):
+        self.name = name
+        self.spec = spec
+        self.landmarks = landmarks
+        self.t = np.asarray(t, dtype=np.float64)
+        self.present = np.ones(len(self.t), dtype=bool) if present is None else \
+            np.asarray(present) > 0
+        self.expected = expected
+
+    @classmethod
+    def from_recording(cls, path, expected=None, spec=None):
+        """Case for a .lmr file; the spec and label default to the recording's metadata"""
+        rec = LandmarkRecording(path)
+        spec = spec or SPECS.get(rec.meta.get("exercise"))
+        if spec is None:
+            raise ValueError(f"{path}: unknown exercise {rec.meta.get('exercise')!r}")
+        return cls(os.path.basename(path), spec, rec.landmarks, rec.t, rec.present,
+                   expected if expected is not None else rec.meta.get("expected"))
+
+    def __len__(self):
+        return len(self.t)
+
+
+class ReplayResult:
+    """Outcome of one case: final count, failed reps, the state timeline and feedback shown"""
+
+    def __init__(self, case, count, failures, timeline, messages=()):
+        self.case = case
+        self.count = count
+        # [(t, reason)] for every rep that was failed
+        self.failures = failures
+        # [(t, from_state, to_state)] for every state change
+        self.timeline = timeline
+        # [(t, text)] every time the feedback message changed
+        self.messages = list(messages)
+
+    def failure_counts(self):
+        return dict(collections.Counter(reason for _, reason in self.failures))
+
+    def mismatches(self):
+        """What differs from the label ([] when it matches or there is no label)"""
+        expected = self.case.expected or {}
+        problems = []
+        if "reps" in expected and expected["reps"] != self.count:
+            problems.append(f"reps {self.count} != {expected['reps']}")
+        if "failures" in expected:
+            got = self.failure_counts()
+            for reason in sorted(set(got) | set(expected["failures"])):
+                want = expected["failures"].get(reason, 0)
+                if got.get(reason, 0) != want:
+                    problems.append(f"{reason} {got.get(reason, 0)} != {want}")
+        shown = {text for _, text in self.messages}
+        for text in expected.get("feedback", ()):
+            if text not in shown:
+                problems.append(f"no {text!r} feedback")
+        for text in expected.get("no_feedback", ()):
+            if text in shown:
+                problems.append(f"unexpected {text!r} feedback")
+        return problems
+
+    @property
+    def passed(self):
+        """True / False against the label, None for an unlabelled case"""
+        return None if self.case.expected is None else not self.mismatches()
+
+
+def replay(cases, batch=DEFAULT_BATCH, filter=None):
+    """Replay cases through their specs; returns a ReplayResult per case, in order.
+
+    Cases of the same spec run as sessions of one RepEngine, one step() per
+    frame for the whole batch, with each session on its own clock. Joint
+    angles are recomputed from the landmarks, so a threshold change in
+    exercises.py is picked up without re-recording. filter=True (or a dict
+    of LandmarkFilter options) smooths the landmarks first, as PosePipeline
+    does live.
+    """
+    cases = list(cases)
+    results = [None] * len(cases)
+    by_spec = collections.defaultdict(list)
+    for i, case in enumerate(cases):
+        by_spec[case.spec].append(i)
+    for spec, indices in by_spec.items():
+        for start in range(0, len(indices), batch):
+            chunk = indices[start:start + batch]
+            for i, result in zip(chunk, _replay_batch(spec, [cases[i] for i in chunk], filter)):
+                results[i] = result
+    return results
+
+
+def _replay_batch(spec, cases, filter=None):
+    n = len(cases)
+    frames = max(len(case) for case in cases)
+    data = np.zeros((frames, n, NUM_LANDMARKS, 4), dtype=np.float32)
+    angles = np.zeros((frames, n, 4), dtype=np.float32)
+    t = np.zeros((frames, n), dtype=np.float64)
+    present = np.zeros((frames, n), dtype=bool)
+    for j, case in enumerate(cases):
+        k = len(case)
+        if not k:
+            continue
+        data[:k, j] = case.landmarks
+        if not filter:
+            joint_angles(data[:k, j], out=angles[:k, j])
+        t[:k, j] = case.t
+        # Padding after a short case: no pose, clock stopped
+        t[k:, j] = case.t[-1]
+        present[:k, j] = case.present
+
+    reps = RepEngine(spec, n)
+    states = reps.table.states
+    reasons = reps.table.reasons
+    failures = [[] for _ in range(n)]
+    timeline = [[] for _ in range(n)]
+    messages = [[] for _ in range(n)]
+    prev_state = reps.state.copy()
+    prev_feedback = reps.feedback_code.copy()
+    prev_failed = np.zeros(n, dtype=bool)
+    failed = np.empty(n, dtype=bool)
+    smoother = rates = None
+    if filter:
+        smoother = LandmarkFilter((n, NUM_LANDMARKS, 3), **(filter if isinstance(filter, dict) else {}))
+        rates = np.zeros((n, 4), dtype=np.float32)
+    for k in range(frames):
+        if smoother:
+            # Lost pose: start over, like PosePipeline
+            smoother.reset(~present[k])
+            smoother(data[k, :, :, :3], t[k], present[k])
+            joint_angles(data[k], out=angles[k])
+            joint_angle_rates(data[k], smoother.velocity, out=rates)
+        reps.step(data[k], angles[k], t[k], present[k], rates)
+        changed = reps.state != prev_state
+        if changed.any():
+            for j in np.flatnonzero(changed):
+                timeline[j].append((float(t[k, j]), states[prev_state[j]], states[reps.state[j]]))
+            prev_state[:] = reps.state
+        changed = reps.feedback_code != prev_feedback
+        if changed.any():
+            for j in np.flatnonzero(changed):
+                messages[j].append((float(t[k, j]), reps.feedback(j)))
+            prev_feedback[:] = reps.feedback_code
+        np.not_equal(reps.flags & FAILED, 0, out=failed)
+        new = failed & ~prev_failed
+        if new.any():
+            for j in np.flatnonzero(new):
+                failures[j].append((float(t[k, j]), reasons[reps.reason[j]]))
+        prev_failed[:] = failed
+
+    return [ReplayResult(case, int(reps.count[j]), failures[j], timeline[j], messages[j])
+            for j, case in enumerate(cases)]
+
+
+# --- Synthetic streams ---
+
+def keyframes(points, fps=30.0):
+    """Piecewise-linear (T,) trajectory through [(value, seconds), ...]
+
+    Each value is reached after its segment's seconds (the first is held for
+    its seconds); returns (values, t).
+    """
+    values = [points[0][0]]
+    times = [0.0]
+    for value, seconds in points:
+        values.append(value)
+        times.append(times[-1] + seconds)
+    t = np.arange(0.0, times[-1], 1.0 / fps)
+    return np.interp(t, times, values), t
+
+
+def rep_keyframes(reps, low, high, rest=0.8, move=1.0, hold=1.0):
+    """Keyframes for reps repetitions low -> high (held) -> low"""
+    points = [(low, rest)]
+    for _ in range(reps):
+        points += [(high, move), (high, hold), (low, move), (low, rest)]
+    return points
+
+
+def pose_from_angles(elbow, shoulder, spread=0.3, noise=0.0, seed=0):
+    """(T, 33, 4) skeleton whose arms have the given (T,) joint angles (degrees).
+
+    Both arms mirror each other; spread is the shoulder width in normalized
+    image units. noise adds Gaussian jitter to x / y like real detections.
+    """
+    elbow = np.radians(np.asarray(elbow, dtype=np.float64))
+    shoulder = np.radians(np.asarray(shoulder, dtype=np.float64))
+    lm = np.full((len(elbow), NUM_LANDMARKS, 4), 0.5, dtype=np.float32)
+    lm[..., VISIBILITY] = 0.9
+    for sign, sh, el, wr, hip in ((-1, LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST, LEFT_HIP),
+                                  (1, RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, RIGHT_HIP)):
+        sx = 0.5 + sign * spread / 2
+        # Upper arm swings out from the hip line by the shoulder angle
+        ex = sx + sign * 0.15 * np.sin(shoulder)
+        ey = 0.4 + 0.15 * np.cos(shoulder)
+        # Forearm: elbow -> shoulder direction turned by the elbow angle
+        ux, uy = (sx - ex) / 0.15, (0.4 - ey) / 0.15
+        c, s = np.cos(elbow), np.sin(elbow)
+        lm[:, sh, X], lm[:, sh, Y] = sx, 0.4
+        lm[:, hip, X], lm[:, hip, Y] = sx, 0.7
+        lm[:, el, X], lm[:, el, Y] = ex, ey
+        lm[:, wr, X] = ex + 0.15 * (c * ux + sign * s * uy)
+        lm[:, wr, Y] = ey + 0.15 * (-sign * s * ux + c * uy)
+    if noise:
+        lm[..., :2] += np.random.default_rng(seed).normal(0.0, noise, lm[..., :2].shape)
+    return lm
+
+
+def synthetic_case(name, spec, elbow, shoulder, expected=None, fps=30.0, noise=0.002,
+                   seed=0, **pose):
+    """Case from keyframe lists (or constants) for the elbow and shoulder angles"""
+    if np.isscalar(elbow):
+        values, t = keyframes(shoulder, fps)
+        elbow = np.full_like(values, elbow)
+        shoulder = values
+    elif np.isscalar(shoulder):
+        values, t = keyframes(elbow, fps)
+        shoulder = np.full_like(values, shoulder)
+        elbow = values
+    else:
+        raise ValueError("Drive one of elbow / shoulder, keep the other constant")
+    return ReplayCase(name, spec, pose_from_angles(elbow, shoulder, noise=noise, seed=seed,
+                                                   **pose), t, expected=expected)
+
+
+def synthetic_suite(copies=1, noise=0.002):
+    """Labelled synthetic cases for every exercise (copies with different noise seeds).
+
+    noise is the landmark jitter (normalized units); raise it to mimic a
+    lighter pose graph.
+    """
+    cases = []
+    for seed in range(copies):
+        def add(name, spec, elbow, shoulder, expected, **pose):
+            case = synthetic_case(name, spec, elbow, shoulder, expected, noise=noise, seed=seed,
+                                  **pose)
+            if copies > 1:
+                case.name = f"{name}#{seed}"
+            cases.append(case)
+            return case
+
+        # Overhead press: elbows 80 -> 160, arms out to the side
+        add("press: 5 clean", OVERHEAD_PRESS, rep_keyframes(5, 80, 165), 90,
+            {"reps": 5, "failures": {}}, spread=0.2)
+        add("press: 3 partial", OVERHEAD_PRESS, rep_keyframes(3, 80, 140), 90,
+            {"reps": 0, "failures": {}}, spread=0.2)
+        narrow = add("press: narrow grip on rep 2", OVERHEAD_PRESS, rep_keyframes(3, 80, 165),
+                     90, {"reps": 2, "failures": {"bad_form": 1}, "feedback": ["Failed: bad form"],
+                          "no_feedback": ["Push higher next time"]}, spread=0.2)
+        # Pull the wrists to the midline while the second rep is held at the top
+        mid = (narrow.t > 5.8) & (narrow.t < 6.4)
+        for wrist in (LEFT_WRIST, RIGHT_WRIST):
+            narrow.landmarks[mid, wrist, X] = 0.5 + 0.1 * (narrow.landmarks[mid, wrist, X] - 0.5)
+
+        # Lateral raise: shoulders 10 -> 95, arms straight
+        add("raise: 5 clean", LATERAL_RAISE, 170, rep_keyframes(5, 10, 95),
+            {"reps": 5, "failures": {}})
+        add("raise: 3 half reps", LATERAL_RAISE, 170, rep_keyframes(3, 10, 60),
+            {"reps": 0, "failures": {"try_again": 3}})
+        # Arms swung past 110 degrees: the elbows rise above the shoulders first
+        add("raise: 3 elbows above shoulders", LATERAL_RAISE, 170, rep_keyframes(3, 10, 130),
+            {"reps": 0, "failures": {"bad_form": 3}})
+        too_high = add("raise: 3 too high", LATERAL_RAISE, 170, rep_keyframes(3, 10, 100),
+                       {"reps": 0, "failures": {"too_high": 3}})
+        # Lean in at the top of each rep: with the hips drawn under the body the
+        # shoulder angle passes 120 while the elbows stay at shoulder height
+        top = joint_angles(too_high.landmarks)[:, L_SHOULDER_ANGLE] > 95
+        too_high.landmarks[top, LEFT_HIP, X] += 0.15
+        too_high.landmarks[top, RIGHT_HIP, X] -= 0.15
+        add("raise: 4 without hold", LATERAL_RAISE, 170, rep_keyframes(4, 10, 95, hold=0.0),
+            {"reps": 4, "failures": {}})
+
+        # Biceps curl tracker: elbows 70 -> 170
+        add("curl: 6 clean", BICEPS_CURL, rep_keyframes(6, 70, 170), 10,
+            {"reps": 6, "failures": {}})
+        add("curl: 4 short", BICEPS_CURL, rep_keyframes(4, 70, 150), 10,
+            {"reps": 0, "failures": {}})
+
+        # App quick counters (right arm only)
+        add("app curl: 5", APP_EXERCISES["Bicep Curl"], rep_keyframes(5, 170, 20), 10,
+            {"reps": 5})
+        add("app press: 5", APP_EXERCISES["Overhead Press"], rep_keyframes(5, 50, 170), 90,
+            {"reps": 5})
+        add("app raise: 5", APP_EXERCISES["Lateral Raise"], 170, rep_keyframes(5, 20, 90),
+            {"reps": 5})
+    return cases
+
+
+def _print_results(results, elapsed, show_timeline=False):
+    frames = sum(len(r.case) for r in results)
+    seconds = sum(float(r.case.t[-1]) for r in results if len(r.case))
+    for r in results:
+        status = {None: "    ", True: "ok  ", False: "FAIL"}[r.passed]
+        failures = ", ".join(f"{k} x{v}" for k, v in sorted(r.failure_counts().items()))
+        print(f"{status} {r.case.name:32s} {r.case.spec.name:22s} reps {r.count:3d}"
+              f"{'  failed: ' + failures if failures else ''}"
+              f"{'  (' + '; '.join(r.mismatches()) + ')' if r.passed is False else ''}")
+        if show_timeline or r.passed is False:
+            for t, src, dst in r.timeline:
+                print(f"        {t:7.2f}s  {src} -> {dst}")
+    failed = sum(r.passed is False for r in results)
+    print(f"{len(results)} cases, {failed} failed; {frames} frames ({seconds:.0f}s of video) "
+          f"in {elapsed:.2f}s = {frames / max(elapsed, 1e-9):.0f} frames/s, "
+          f"{seconds / max(elapsed, 1e-9):.0f}x real time")
+    return failed
+
+
+# Regression run: python replay.py [recording.lmr | folder ...] [--labels labels.json]
+#                 [--timeline] [--copies N] [--noise X] [--filter]
+# With no recordings the labelled synthetic suite is replayed (--copies N
+# repeats it with different noise, --noise sets the landmark jitter).
+# --filter runs the landmarks through the One Euro filter first.
+# Exit status 1 if any labelled case fails.
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    show_timeline = "--timeline" in args
+    if show_timeline:
+        args.remove("--timeline")
+    smooth = "--filter" in args
+    if smooth:
+        args.remove("--filter")
+    labels = {}
+    copies = 1
+    noise = 0.002
+    for option in ("--labels", "--copies", "--noise"):
+        if option in args:
+            i = args.index(option)
+            value = args[i + 1]
+            del args[i:i + 2]
+            if option == "--labels":
+                with open(value) as f:
+                    labels = json.load(f)
+            elif option == "--copies":
+                copies = int(value)
+            else:
+                noise = float(value)
+
+    if args:
+        paths = []
+        for arg in args:
+            paths += sorted(glob.glob(os.path.join(arg, "*.lmr"))) if os.path.isdir(arg) else [arg]
+        cases = [ReplayCase.from_recording(p, labels.get(os.path.basename(p))) for p in paths]
+    else:
+        cases = synthetic_suite(copies, noise)
+
+    start = time.perf_counter()
+    results = replay(cases, filter=smooth)
+    elapsed = time.perf_counter() - start
+    sys.exit(1 if _print_results(results, elapsed, show_timeline) else 0)
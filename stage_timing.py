@@ -0,0 +1,237 @@
+import bisect
+import itertools
+import os
+import sys
+import threading
+import time
+import weakref
+
+# Instrumentation switch: POSE_TIMING=0 creates no timers, and every timing
+# hook is then a single `if timing:` test on None
+ENABLED = os.environ.get("POSE_TIMING", "1") != "0"
+
+# Frame pipeline stages, in order
+STAGES = ("to_ndarray", "flip", "convert", "pose", "reps", "draw", "from_ndarray")
+
+# Histogram bucket upper bounds (seconds): log-spaced 10us .. 10s, ~26% apart,
+# plus an overflow bucket
+BUCKET_BOUNDS = [1e-5 * 10 ** (i / 10) for i in range(61)]
+
+# Prometheus snapshot written by the background writer
+DEFAULT_SNAPSHOT_PATH = "metrics/pose_timing.prom"
+DEFAULT_SNAPSHOT_INTERVAL = 5.0
+
+
+class LatencyHistogram:
+    """Fixed-size latency histogram (BUCKET_BOUNDS), constant memory per stage.
+
+    record() is a bisect and an increment; it is meant to be called from one
+    thread, while readers on other threads may see a sample or two late.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """q-th percentile (0..100) in seconds, interpolated inside its bucket"""
+        count = self.count
+        if not count:
+            return 0.0
+        rank = q / 100 * count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKET_BOUNDS[i - 1] if i else 0.0
+                upper = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def reset(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class StageTimer:
+    """One stream's latency histogram per pipeline stage.
+
+    Hooks chain perf_counter() readings so each stage costs one clock read:
+
+        t = time.perf_counter()
+        ...
+        if timing: t = timing.lap("flip", t)
+
+    Different stages may be timed from different threads (e.g. the WebRTC
+    callback and the async inference worker), but each stage from only one.
+    """
+
+    def __init__(self, stream, stages=STAGES):
+        self.stream = stream
+        self.histograms = {stage: LatencyHistogram() for stage in stages}
+
+    def lap(self, stage, start):
+        """Record the time since start for stage; returns the current time"""
+        now = time.perf_counter()
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histograms.setdefault(stage, LatencyHistogram())
+        hist.record(now - start)
+        return now
+
+    def record(self, stage, seconds):
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histograms.setdefault(stage, LatencyHistogram())
+        hist.record(seconds)
+
+    def summary(self):
+        """{stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}} for stages seen so far"""
+        out = {}
+        for stage, hist in list(self.histograms.items()):
+            if hist.count:
+                out[stage] = {
+                    "count": hist.count,
+                    "mean_ms": 1000 * hist.total / hist.count,
+                    "p50_ms": 1000 * hist.percentile(50),
+                    "p95_ms": 1000 * hist.percentile(95),
+                    "p99_ms": 1000 * hist.percentile(99),
+                    "max_ms": 1000 * hist.max,
+                }
+        return out
+
+    def reset(self):
+        for hist in self.histograms.values():
+            hist.reset()
+
+
+# Every live timer, for the snapshot (a stream's timer goes away with its tracker)
+_timers = weakref.WeakSet()
+_timers_lock = threading.Lock()
+_stream_ids = itertools.count(1)
+
+
+def stage_timer(name):
+    """New StageTimer for a stream called name, or None when timing is switched off"""
+    if not ENABLED:
+        return None
+    timer = StageTimer(f"{name}-{next(_stream_ids)}")
+    with _timers_lock:
+        _timers.add(timer)
+    return timer
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(timers=None):
+    """Prometheus text exposition of every stream's stage histograms"""
+    if timers is None:
+        with _timers_lock:
+            timers = list(_timers)
+    timers = sorted(timers, key=lambda timer: timer.stream)
+    lines = [
+        "# HELP pose_stage_seconds Frame pipeline latency per stream and stage",
+        "# TYPE pose_stage_seconds histogram",
+    ]
+    quantiles = [
+        "# HELP pose_stage_quantile_seconds p50 / p95 / p99 of pose_stage_seconds",
+        "# TYPE pose_stage_quantile_seconds gauge",
+    ]
+    bounds = [f"{b:.6g}" for b in BUCKET_BOUNDS]
+    for timer in timers:
+        for stage, hist in sorted(timer.histograms.items()):
+            if not hist.count:
+                continue
+            labels = f'stream="{_label(timer.stream)}",stage="{_label(stage)}"'
+            counts = list(hist.counts)
+            cumulative = 0
+            for le, n in zip(bounds, counts):
+                cumulative += n
+                lines.append(f'pose_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'pose_stage_seconds_bucket{{{labels},le="+Inf"}} {sum(counts)}')
+            lines.append(f"pose_stage_seconds_sum{{{labels}}} {hist.total:.9g}")
+            lines.append(f"pose_stage_seconds_count{{{labels}}} {sum(counts)}")
+            for q in (50, 95, 99):
+                quantiles.append(f'pose_stage_quantile_seconds{{{labels},quantile="{q / 100}"}} '
+                                 f"{hist.percentile(q):.9g}")
+    return "\n".join(lines + quantiles) + "\n"
+
+
+def write_snapshot(path=DEFAULT_SNAPSHOT_PATH, timers=None):
+    """Write prometheus_text() to path atomically (readers never see half a file)"""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(prometheus_text(timers))
+    os.replace(tmp, path)
+    return path
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def start_snapshots(path=DEFAULT_SNAPSHOT_PATH, interval=DEFAULT_SNAPSHOT_INTERVAL):
+    """Process-wide thread rewriting the snapshot every interval seconds (started once)"""
+    global _writer
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                write_snapshot(path)
+            except OSError as e:
+                print(f"Could not write timing snapshot: {e}")
+
+    with _writer_lock:
+        if _writer is None and ENABLED:
+            _writer = threading.Thread(target=run, name="timing-snapshot", daemon=True)
+            _writer.start()
+    return path
+
+
+# Overhead per hook: python stage_timing.py [iterations]
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    timer = StageTimer("bench")
+    timing = None
+
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    loop = (time.perf_counter() - start) / n
+
+    start = time.perf_counter()
+    t = start
+    for _ in range(n):
+        if timing:
+            t = timing.lap("pose", t)
+    off = (time.perf_counter() - start) / n - loop
+
+    timing = timer
+    start = time.perf_counter()
+    t = start
+    for _ in range(n):
+        if timing:
+            t = timing.lap("pose", t)
+    on = (time.perf_counter() - start) / n - loop
+
+    print(f"hook off: {1e9 * off:.0f} ns, hook on: {1e9 * on:.0f} ns per stage")
+    print(timer.summary()["pose"])
@@ -0,0 +1,111 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Heavy imports on the app's path, each timed alone in a fresh interpreter
+IMPORTS = ("numpy", "cv2", "av", "mediapipe", "streamlit", "streamlit_webrtc",
+           "pose_engine", "pose_pipeline", "process_engine", "exercises", "exercise_registry")
+
+DEFAULT_RERUNS = 5
+# Time between the page loading and the first camera frame (WebRTC handshake)
+DEFAULT_WAIT = 2.0
+
+
+def _child(args):
+    """Run one measurement in a fresh interpreter and return its JSON result"""
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", *map(str, args)],
+                         capture_output=True, text=True, cwd=HERE, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def import_seconds(module):
+    """Cold import time of module in a fresh interpreter"""
+    return _child(["import", module])["seconds"]
+
+
+def app_timings(wait, reruns=DEFAULT_RERUNS, frames=30):
+    """Cold script run, rerun and first-frame latency of app.py in a fresh interpreter.
+
+    The WebRTC component needs a browser session, so the script's
+    webrtc_streamer call is captured and frames go straight to its
+    callback; its module is imported before the clock starts (its cost is
+    in the import table). The first frame arrives wait seconds after the
+    page has loaded.
+    """
+    return _child(["app", wait, reruns, frames])
+
+
+def _measure_app(wait, reruns, frames):
+    import fractions
+
+    import av
+    import numpy as np
+    import streamlit_webrtc
+    from streamlit.testing.v1 import AppTest
+
+    captured = {}
+    streamlit_webrtc.webrtc_streamer = lambda **kwargs: captured.update(kwargs)
+
+    start = time.perf_counter()
+    at = AppTest.from_file(os.path.join(HERE, "app.py"), default_timeout=300).run()
+    cold = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    time.sleep(wait)
+    callback = captured["video_frame_callback"]
+    rng = np.random.default_rng(0)
+    # Fresh noise every frame so the motion gate lets each one through to inference
+    images = rng.integers(0, 255, (4, 480, 640, 3), dtype=np.uint8)
+    latencies = []
+    for k in range(frames):
+        frame = av.VideoFrame.from_ndarray(images[k % len(images)], format="bgr24")
+        frame.pts = k * 3000
+        frame.time_base = fractions.Fraction(1, 90000)
+        t = time.perf_counter()
+        callback(frame)
+        latencies.append(time.perf_counter() - t)
+
+    # Widget interaction once the stream is running
+    start = time.perf_counter()
+    for _ in range(reruns):
+        at.run()
+    rerun = (time.perf_counter() - start) / reruns
+    return {"cold": cold, "rerun": rerun, "first_frame": latencies[0],
+            "frame": float(np.median(latencies[1:]))}
+
+
+# Cold start / rerun / time to first frame: python startup_benchmark.py [--wait S] [--reruns N]
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        if args[1] == "import":
+            start = time.perf_counter()
+            __import__(args[2])
+            result = {"seconds": time.perf_counter() - start}
+        else:
+            result = _measure_app(float(args[2]), int(args[3]), int(args[4]))
+        print(json.dumps(result))
+        sys.exit(0)
+
+    options = {"--wait": DEFAULT_WAIT, "--reruns": DEFAULT_RERUNS}
+    for option in options:
+        if option in args:
+            i = args.index(option)
+            options[option] = type(options[option])(args[i + 1])
+            del args[i:i + 2]
+
+    print("cold import (fresh interpreter each):")
+    for module in IMPORTS:
+        print(f"  {module:18s} {1000 * import_seconds(module):7.0f} ms")
+
+    for wait in (0.0, options["--wait"]):
+        r = app_timings(wait, options["--reruns"])
+        print(f"first frame {wait:.1f}s after page load: script cold {1000 * r['cold']:.0f} ms, "
+              f"rerun {1000 * r['rerun']:.0f} ms, first frame {1000 * r['first_frame']:.0f} ms "
+              f"(then {1000 * r['frame']:.1f} ms/frame); time to first frame "
+              f"{1000 * (r['cold'] + wait + r['first_frame']):.0f} ms")